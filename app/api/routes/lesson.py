@@ -1,3 +1,5 @@
+import heapq
+from operator import itemgetter
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.models.requests import LessonRequest, SequenceRequest
@@ -25,6 +27,9 @@ async def generate_lesson_plan(
     - Automatic skill card attachment
     - RAG-enhanced skill selection
     - Cross-activity variety management
+    
+    The lesson is saved in the background after the response is sent, so a GET for
+    the returned lesson_id can briefly 404. Set sync_save to respond only once it is saved.
     """
     try:
         logger.info(
@@ -249,7 +254,7 @@ def _analyze_thinking_skills(lessons: List[LessonResponse]) -> dict:
     for lesson in lessons:
         for skill_name in lesson.metadata.skills_used:
             skills[skill_name] = skills.get(skill_name, 0) + 1
-    return dict(sorted(skills.items(), key=lambda x: x[1], reverse=True)[:10])
+    return dict(heapq.nlargest(10, skills.items(), key=itemgetter(1)))
 
 
 def _analyze_difficulty(lessons: List[LessonResponse]) -> dict:
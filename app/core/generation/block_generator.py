@@ -1,11 +1,13 @@
-import uuid
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.models.lesson import SkillSpec, GenerationContext
 from app.models.responses import LessonBlock, SkillMetadata
 from app.core.generation.prompt_builder import prompt_builder
 from app.core.generation.llm_client import llm_service
 from app.core.rag.context_builder import rag_context_builder
+from app.core.skills.enhanced_metadata import enhanced_skill_metadata
+from app.core.skills.icons import icon_url_for
 from app.utils.exceptions import LLMGenerationError, ValidationError
+from app.utils.ids import short_id
 from app.utils.logging import get_logger
 from app.core.rag.scaffold_retriever import scaffold_retriever
 
@@ -32,49 +34,34 @@ class BlockGenerator:
             SkillSpec with corrected color and block_type if needed
         """
         try:
-            # Import the enhanced metadata
-            from app.core.skills.enhanced_metadata import enhanced_skill_metadata
-            
             # Look up the correct color and block_type for this skill
-            correct_color = None
-            correct_block_type = None
+            placement = enhanced_skill_metadata.get_skill_placement(skill.name)
+            if placement is None:
+                return skill
+            correct_color, correct_block_type = placement
             
-            # Check each color category
-            for color, color_data in enhanced_skill_metadata._skills_data.items():
-                # Look for the skill in this color
-                for skill_data in color_data.get("skills", []):
-                    if skill_data["skill"] == skill.name:
-                        correct_color = color
-                        correct_block_type = skill_data["block_type"]
-                        break
-                
-                if correct_color:
-                    break
+            # If the metadata matches, return the original
+            if skill.color == correct_color and skill.block_type == correct_block_type:
+                return skill
             
-            # If we found correct metadata, check if it matches
-            if correct_color and correct_block_type:
-                if skill.color != correct_color or skill.block_type != correct_block_type:
-                    logger.warning(
-                        f"Correcting skill metadata: {skill.name} should be {correct_color}/{correct_block_type}, "
-                        f"not {skill.color}/{skill.block_type}"
-                    )
-                    
-                    # Generate the correct icon URL
-                    icon_url = f"https://cdn.structural-learning.com/icons/{correct_color.lower()}_{skill.name.lower().replace(' ', '_')}.svg"
-                    
-                    # Return a corrected SkillSpec
-                    return SkillSpec(
-                        name=skill.name,
-                        color=correct_color,
-                        block_type=correct_block_type,
-                        example_question=skill.example_question,
-                        description=skill.description,
-                        icon_url=icon_url,
-                        media_suggestion=skill.media_suggestion
-                    )
+            logger.warning(
+                f"Correcting skill metadata: {skill.name} should be {correct_color}/{correct_block_type}, "
+                f"not {skill.color}/{skill.block_type}"
+            )
             
-            # If no correction needed or metadata not found, return the original
-            return skill
+            # Generate the correct icon URL
+            icon_url = icon_url_for(skill.name, correct_color)
+            
+            # Return a corrected SkillSpec
+            return SkillSpec(
+                name=skill.name,
+                color=correct_color,
+                block_type=correct_block_type,
+                example_question=skill.example_question,
+                description=skill.description,
+                icon_url=icon_url,
+                media_suggestion=skill.media_suggestion
+            )
             
         except Exception as e:
             logger.error(f"Error verifying skill metadata for {skill.name}", error=str(e))
@@ -84,7 +71,8 @@ class BlockGenerator:
         self,
         skill: SkillSpec,
         context: GenerationContext,
-        sequence_order: int = 0
+        sequence_order: int = 0,
+        skill_context: Optional[List[Dict[str, Any]]] = None
     ) -> LessonBlock:
         """
         Generate a complete lesson block for a given skill, preserving color and block type
@@ -93,6 +81,7 @@ class BlockGenerator:
             skill: The thinking skill to use
             context: Generation context with lesson parameters
             sequence_order: Position in the lesson sequence
+            skill_context: Pre-fetched skill examples (retrieved per block if None)
             
         Returns:
                 Complete LessonBlock object with resources
@@ -118,7 +107,9 @@ class BlockGenerator:
             )
             
             # Build RAG-enhanced context
-            rag_context = await self.rag_builder.build_block_context(verified_skill, context)
+            rag_context = await self.rag_builder.build_block_context(
+                verified_skill, context, skill_context=skill_context
+            )
             
             # Add resource hints to context
             if scaffold_resources["pdfs"]:
@@ -195,7 +186,7 @@ class BlockGenerator:
         )
         
         # Create block ID
-        block_id = f"block-{str(uuid.uuid4())[:8]}"
+        block_id = short_id("block")
         
         # Build media URLs list
         media = []
@@ -332,7 +323,7 @@ class BlockGenerator:
         )
         
         # Create block ID
-        block_id = f"block-{str(uuid.uuid4())[:8]}"
+        block_id = short_id("block")
         
         # Build media URLs if media suggestion exists
         media = []
@@ -385,9 +376,21 @@ class BlockGenerator:
         """Generate multiple blocks for a complete lesson"""
         blocks = []
         
-        for i, skill in enumerate(skills):
+        # Verify each skill once; generate_block finds the verified skills already correct
+        verified_skills = [self._verify_skill_metadata(skill) for skill in skills]
+        
+        # Fetch skill examples for every block up front (one embedding batch, concurrent queries)
+        skill_contexts = await self.rag_builder.retriever.retrieve_by_skills_bulk(
+            skills=verified_skills,
+            subject=context.subject,
+            top_k_per_skill=3
+        )
+        
+        for i, skill in enumerate(verified_skills):
             try:
-                block = await self.generate_block(skill, context, sequence_order=i)
+                block = await self.generate_block(
+                    skill, context, sequence_order=i, skill_context=skill_contexts.get(skill.name)
+                )
                 blocks.append(block)
             except Exception as e:
                 logger.error(
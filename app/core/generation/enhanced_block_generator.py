@@ -1,4 +1,3 @@
-import uuid
 from typing import Dict, Any, List, Optional, Tuple
 from app.models.lesson import SkillSpec, GenerationContext
 from app.models.responses import LessonBlock, SkillMetadata, ResourceLink
@@ -8,6 +7,7 @@ from app.core.generation.llm_client import llm_service
 from app.core.rag.context_builder import rag_context_builder
 from app.core.rag.scaffold_retriever import scaffold_retriever
 from app.utils.exceptions import LLMGenerationError, ValidationError
+from app.utils.ids import short_id
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -306,7 +306,7 @@ class EnhancedBlockGenerator:
         )
         
         # Create block ID
-        block_id = f"prompt-{str(uuid.uuid4())[:8]}"
+        block_id = short_id("prompt")
         
         # Get complexity level display name
         from app.core.skills.enhanced_metadata import enhanced_skill_metadata
@@ -384,7 +384,7 @@ class EnhancedBlockGenerator:
         )
         
         # Create block ID
-        block_id = f"block-{str(uuid.uuid4())[:8]}"
+        block_id = short_id("block")
         
         # Build media URLs
         media = []
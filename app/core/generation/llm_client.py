@@ -1,3 +1,4 @@
+import asyncio
 import openai
 import json
 from typing import Dict, Any, Optional
@@ -60,7 +61,10 @@ class OpenAIClient(LLMClient):
         try:
             model = self.advanced_model if use_advanced_model else self.default_model
             
-            response = self.client.chat.completions.create(
+            # The OpenAI client is synchronous; run it in a worker thread so
+            # concurrent generations do not block the event loop
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model=model,
                 messages=[
                     {
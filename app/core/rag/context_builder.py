@@ -79,7 +79,8 @@ class RAGContextBuilder:
     async def build_block_context(
         self,
         skill: SkillSpec,
-        base_context: GenerationContext
+        base_context: GenerationContext,
+        skill_context: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """
         Build specific context for a single block generation
@@ -87,18 +88,20 @@ class RAGContextBuilder:
         Args:
             skill: The thinking skill for this block
             base_context: Base lesson context
+            skill_context: Pre-fetched skill examples (retrieved here if None)
             
         Returns:
             Enriched context string for prompt
         """
         try:
             # Get skill-specific examples and strategies
-            skill_context = await self.retriever.retrieve_by_skill(
-                skill_name=skill.name,
-                block_type=skill.block_type,
-                subject=base_context.subject,
-                top_k=3
-            )
+            if skill_context is None:
+                skill_context = await self.retriever.retrieve_by_skill(
+                    skill_name=skill.name,
+                    block_type=skill.block_type,
+                    subject=base_context.subject,
+                    top_k=3
+                )
             
             # Combine base context with skill-specific context
             context_parts = []
@@ -179,8 +182,8 @@ class RAGContextBuilder:
         all_terms = quoted_terms + capitalized_terms
         key_concepts = [term for term in all_terms if len(term.split()) <= 3 and len(term) > 3]
         
-        # Return unique concepts, limited to most relevant
-        return list(set(key_concepts))[:10]
+        # Return unique concepts in order of appearance, limited to most relevant
+        return list(dict.fromkeys(key_concepts))[:10]
 
 
 # Global instance
@@ -1,5 +1,9 @@
+import asyncio
+import time
 import openai
-from typing import List, Dict, Any
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 from app.utils.exceptions import EmbeddingError
 from app.utils.logging import get_logger
@@ -14,6 +18,11 @@ class TextEmbedder:
     def __init__(self):
         self.client = openai.OpenAI(api_key=settings.openai_api_key)
         self.model = "text-embedding-3-small"  # Cost-effective embedding model
+        
+        # Embedding cache: cleaned text -> (stored_at, float16 bytes)
+        self._cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._cache_max_entries = 2048
+        self._cache_ttl_seconds = 3600
     
     @retry(
         stop=stop_after_attempt(3),
@@ -31,18 +40,24 @@ class TextEmbedder:
             List of floats representing the embedding
         """
         try:
-            if not text or not text.strip():
+            # Clean and truncate text in a single pass; whitespace-only input cleans to ""
+            cleaned_text = self._clean_text(text) if text else ""
+            if not cleaned_text:
                 raise EmbeddingError("Empty text provided for embedding")
             
-            # Clean and truncate text if necessary
-            cleaned_text = self._clean_text(text)
+            cached = self._get_cached_embedding(cleaned_text)
+            if cached is not None:
+                return cached
             
-            response = self.client.embeddings.create(
+            # The OpenAI client is synchronous; keep the request off the event loop
+            response = await asyncio.to_thread(
+                self.client.embeddings.create,
                 model=self.model,
                 input=cleaned_text
             )
             
             embedding = response.data[0].embedding
+            self._cache_embedding(cleaned_text, embedding)
             
             logger.debug(
                 "Text embedded successfully",
@@ -75,13 +90,18 @@ class TextEmbedder:
             if not texts:
                 return []
             
-            # Clean texts
-            cleaned_texts = [self._clean_text(text) for text in texts if text and text.strip()]
+            # Clean texts in a single pass, dropping empty/whitespace-only inputs
+            cleaned_texts = []
+            for text in texts:
+                cleaned = self._clean_text(text) if text else ""
+                if cleaned:
+                    cleaned_texts.append(cleaned)
             
             if not cleaned_texts:
                 return []
             
-            response = self.client.embeddings.create(
+            response = await asyncio.to_thread(
+                self.client.embeddings.create,
                 model=self.model,
                 input=cleaned_texts
             )
@@ -100,6 +120,28 @@ class TextEmbedder:
             logger.error("Error generating batch embeddings", error=str(e), batch_size=len(texts))
             raise EmbeddingError(f"Failed to generate batch embeddings: {str(e)}")
     
+    def _get_cached_embedding(self, cleaned_text: str) -> Optional[List[float]]:
+        """Return a cached embedding, upcast to float32, or None if missing/expired"""
+        entry = self._cache.get(cleaned_text)
+        if entry is None:
+            return None
+        
+        stored_at, raw = entry
+        if time.monotonic() - stored_at > self._cache_ttl_seconds:
+            del self._cache[cleaned_text]
+            return None
+        
+        self._cache.move_to_end(cleaned_text)
+        return np.frombuffer(raw, dtype=np.float16).astype(np.float32).tolist()
+    
+    def _cache_embedding(self, cleaned_text: str, embedding: List[float]):
+        """Store an embedding as float16 bytes (half the memory of float32)"""
+        self._cache[cleaned_text] = (time.monotonic(), np.asarray(embedding, dtype=np.float16).tobytes())
+        self._cache.move_to_end(cleaned_text)
+        
+        while len(self._cache) > self._cache_max_entries:
+            self._cache.popitem(last=False)
+    
     def _clean_text(self, text: str) -> str:
         """Clean and prepare text for embedding"""
         # Remove excessive whitespace
@@ -0,0 +1,38 @@
+import threading
+import time
+from typing import FrozenSet, Optional, Tuple
+from pinecone import Pinecone
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# How long a list_indexes() result is trusted before asking Pinecone again
+INDEX_NAMES_TTL_SECONDS = 300
+
+_index_names_cache: Optional[Tuple[float, FrozenSet[str]]] = None
+_index_names_lock = threading.Lock()
+
+
+def index_exists(pinecone: Pinecone, index_name: str) -> bool:
+    """
+    Check whether a Pinecone index exists, sharing one cached listing per process
+
+    Retrievers call this on construction instead of list_indexes(), so the
+    index names are fetched at most once per INDEX_NAMES_TTL_SECONDS.
+
+    Args:
+        pinecone: Pinecone client used if the cache is empty or expired
+        index_name: Name of the index to look for
+
+    Returns:
+        True if the index is listed
+    """
+    global _index_names_cache
+
+    with _index_names_lock:
+        now = time.monotonic()
+        if _index_names_cache is None or now - _index_names_cache[0] > INDEX_NAMES_TTL_SECONDS:
+            _index_names_cache = (now, frozenset(pinecone.list_indexes().names()))
+            logger.debug("Pinecone index list refreshed", index_count=len(_index_names_cache[1]))
+
+        return index_name in _index_names_cache[1]
@@ -1,7 +1,13 @@
+import asyncio
+import time
+import numpy as np
+from collections import OrderedDict
 from pinecone import Pinecone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
 from app.core.rag.embedder import text_embedder
+from app.core.rag.pinecone_index import index_exists
+from app.models.lesson import SkillSpec
 from app.utils.exceptions import RAGRetrievalError
 from app.utils.logging import get_logger
 
@@ -12,14 +18,21 @@ class CurriculumRetriever:
     def __init__(self):
         self._pinecone = Pinecone(api_key=settings.pinecone_api_key)
         self._index = None
+        
+        # Retrieved context cache: (topic, subject, grade, curriculum, top_k) -> (stored_at, chunks)
+        self._context_cache: "OrderedDict[Tuple, Tuple[float, Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+        self._context_cache_max_entries = 1024
+        self._context_cache_ttl_seconds = 3600
+        
+        # In-flight context fetches, so concurrent identical misses share one retrieval
+        self._context_inflight: Dict[Tuple, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+        
         self._initialize_pinecone()
 
     def _initialize_pinecone(self):
         """Initialize Pinecone connection"""
         try:
-            indexes = self._pinecone.list_indexes().names()
-
-            if settings.pinecone_index_name not in indexes:
+            if not index_exists(self._pinecone, settings.pinecone_index_name):
                 logger.warning(
                     "Pinecone index not found - will need to be created",
                     index_name=settings.pinecone_index_name
@@ -57,53 +70,112 @@ class CurriculumRetriever:
                 logger.warning("Pinecone index not available - returning empty context")
                 return []
             
-            # Create search query
-            query_text = text_embedder.create_query_embedding(topic, subject, grade, curriculum)
-            
-            # Generate query embedding
-            query_embedding = await text_embedder.embed_text(query_text)
+            # Identical lesson parameters skip both the embedding call and the Pinecone query
+            cache_key = (topic, subject, grade, curriculum, top_k)
+            cached_chunks = self._get_cached_context(cache_key)
+            if cached_chunks is not None:
+                logger.debug("Curriculum context served from cache", topic=topic, subject=subject)
+                return cached_chunks
             
-            # Build metadata filter
-            metadata_filter = self._build_metadata_filter(subject, grade, curriculum)
-            
-            # Search in Pinecone
-            search_results = self._index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_values=False,
-                include_metadata=True,
-                filter=metadata_filter
-            )
-            
-            # Process results
-            context_chunks = []
-            for match in search_results.matches:
-                chunk = {
-                    'id': match.id,
-                    'score': match.score,
-                    'content': match.metadata.get('content', ''),
-                    'source': match.metadata.get('source', ''),
-                    'subject': match.metadata.get('subject', ''),
-                    'grade': match.metadata.get('grade', ''),
-                    'curriculum': match.metadata.get('curriculum', ''),
-                    'chunk_type': match.metadata.get('chunk_type', '')
-                }
-                context_chunks.append(chunk)
-            
-            logger.info(
-                "Retrieved curriculum context",
-                query=query_text,
-                results_count=len(context_chunks),
-                avg_score=sum(c['score'] for c in context_chunks) / len(context_chunks) if context_chunks else 0
-            )
+            # Join a fetch already running for the same parameters, or start one
+            fetch = self._context_inflight.get(cache_key)
+            if fetch is None:
+                fetch = asyncio.ensure_future(
+                    self._fetch_context(cache_key, topic, subject, grade, curriculum, top_k)
+                )
+                self._context_inflight[cache_key] = fetch
+                fetch.add_done_callback(lambda _: self._context_inflight.pop(cache_key, None))
             
-            return context_chunks
+            # Shielded so one cancelled caller does not cancel the fetch for the others
+            context_chunks = await asyncio.shield(fetch)
+            return [dict(chunk) for chunk in context_chunks]
             
         except Exception as e:
             logger.error("Error retrieving curriculum context", error=str(e))
             # Don't raise - allow graceful degradation with empty context
             return []
     
+    async def _fetch_context(
+        self,
+        cache_key: Tuple,
+        topic: str,
+        subject: str,
+        grade: str,
+        curriculum: str,
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Embed the lesson query, search Pinecone and cache the resulting chunks"""
+        # Create search query
+        query_text = text_embedder.create_query_embedding(topic, subject, grade, curriculum)
+        
+        # Generate query embedding
+        query_embedding = await text_embedder.embed_text(query_text)
+        
+        # Build metadata filter
+        metadata_filter = self._build_metadata_filter(subject, grade, curriculum)
+        
+        # Search in Pinecone
+        search_results = await asyncio.to_thread(
+            self._index.query,
+            vector=query_embedding,
+            top_k=top_k,
+            include_values=False,
+            include_metadata=True,
+            filter=metadata_filter
+        )
+        
+        # Stage scores once as float32 for averaging and any score-based reranking
+        matches = search_results.matches
+        scores = np.fromiter((m.score for m in matches), dtype=np.float32, count=len(matches))
+        
+        # Process results
+        context_chunks = []
+        for match in matches:
+            chunk = {
+                'id': match.id,
+                'score': match.score,
+                'content': match.metadata.get('content', ''),
+                'source': match.metadata.get('source', ''),
+                'subject': match.metadata.get('subject', ''),
+                'grade': match.metadata.get('grade', ''),
+                'curriculum': match.metadata.get('curriculum', ''),
+                'chunk_type': match.metadata.get('chunk_type', '')
+            }
+            context_chunks.append(chunk)
+        
+        logger.info(
+            "Retrieved curriculum context",
+            query=query_text,
+            results_count=len(context_chunks),
+            avg_score=float(scores.mean()) if scores.size else 0.0
+        )
+        
+        self._cache_context(cache_key, context_chunks)
+        
+        return context_chunks
+    
+    def _get_cached_context(self, cache_key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return copies of cached context chunks, or None if missing/expired"""
+        entry = self._context_cache.get(cache_key)
+        if entry is None:
+            return None
+        
+        stored_at, chunks = entry
+        if time.monotonic() - stored_at > self._context_cache_ttl_seconds:
+            del self._context_cache[cache_key]
+            return None
+        
+        self._context_cache.move_to_end(cache_key)
+        return [dict(chunk) for chunk in chunks]
+    
+    def _cache_context(self, cache_key: Tuple, context_chunks: List[Dict[str, Any]]):
+        """Store retrieved context chunks keyed by the exact query parameters"""
+        self._context_cache[cache_key] = (time.monotonic(), tuple(dict(chunk) for chunk in context_chunks))
+        self._context_cache.move_to_end(cache_key)
+        
+        while len(self._context_cache) > self._context_cache_max_entries:
+            self._context_cache.popitem(last=False)
+    
     def _build_metadata_filter(self, subject: str, grade: str, curriculum: str) -> Dict[str, Any]:
         """Build Pinecone metadata filter"""
         filter_conditions = {}
@@ -153,40 +225,10 @@ class CurriculumRetriever:
             if not self._index:
                 return []
             
-            # Create skill-specific query
-            query_text = f"{skill_name} {block_type} teaching strategy example"
-            if subject:
-                query_text += f" {subject}"
-            
-            query_embedding = await text_embedder.embed_text(query_text)
-            
-            # Build filter for instructional resources
-            metadata_filter = {
-                'chunk_type': {'$eq': 'instructional_strategy'}
-            }
-            if subject:
-                metadata_filter['subject'] = {'$eq': subject}
-            
-            search_results = self._index.query(
-                vector=query_embedding,
-                top_k=top_k,
-                include_values=False,
-                include_metadata=True,
-                filter=metadata_filter
+            query_embedding = await text_embedder.embed_text(
+                self._skill_query_text(skill_name, block_type, subject)
             )
-            
-            # Process results
-            strategy_examples = []
-            for match in search_results.matches:
-                example = {
-                    'id': match.id,
-                    'score': match.score,
-                    'content': match.metadata.get('content', ''),
-                    'strategy_type': match.metadata.get('strategy_type', ''),
-                    'skill': match.metadata.get('skill', ''),
-                    'example_activity': match.metadata.get('example_activity', '')
-                }
-                strategy_examples.append(example)
+            strategy_examples = await self._query_skill_examples(query_embedding, subject, top_k)
             
             logger.debug(
                 "Retrieved skill-specific context",
@@ -201,6 +243,115 @@ class CurriculumRetriever:
             logger.error("Error retrieving skill context", error=str(e))
             return []
     
+    async def retrieve_by_skills_bulk(
+        self,
+        skills: List[SkillSpec],
+        subject: str = None,
+        top_k_per_skill: int = 3
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve skill-specific context for several skills, as retrieve_by_skill would per skill
+        
+        All skill queries are embedded in one batch call, then queried concurrently
+        with the same filter as retrieve_by_skill. Skills whose query failed are left
+        out of the result, so callers fall back to per-skill retrieval for them.
+        
+        Args:
+            skills: Thinking skills to retrieve examples for
+            subject: Optional subject filter
+            top_k_per_skill: Number of results to retrieve per skill
+            
+        Returns:
+            Dict mapping skill name to its list of examples (empty dict if unavailable)
+        """
+        try:
+            if not self._index or not skills:
+                return {}
+            
+            # Unique skill names, preserving lesson order
+            block_types = {}
+            for skill in skills:
+                block_types.setdefault(skill.name, skill.block_type)
+            skill_names = list(block_types)
+            
+            query_embeddings = await text_embedder.embed_batch([
+                self._skill_query_text(skill_name, block_types[skill_name], subject)
+                for skill_name in skill_names
+            ])
+            if len(query_embeddings) != len(skill_names):
+                logger.warning("Bulk skill embedding incomplete - falling back to per-skill retrieval")
+                return {}
+            
+            results = await asyncio.gather(
+                *(self._query_skill_examples(embedding, subject, top_k_per_skill) for embedding in query_embeddings),
+                return_exceptions=True
+            )
+            
+            strategy_examples = {}
+            for skill_name, result in zip(skill_names, results):
+                if isinstance(result, Exception):
+                    logger.error("Error retrieving skill context", skill=skill_name, error=str(result))
+                    continue
+                strategy_examples[skill_name] = result
+            
+            logger.debug(
+                "Retrieved skill-specific context in bulk",
+                skills=skill_names,
+                results_count=sum(len(examples) for examples in strategy_examples.values())
+            )
+            
+            return strategy_examples
+            
+        except Exception as e:
+            logger.error("Error retrieving bulk skill context", error=str(e))
+            return {}
+    
+    @staticmethod
+    def _skill_query_text(skill_name: str, block_type: str, subject: Optional[str]) -> str:
+        """Build the search text for a thinking skill and block type"""
+        query_text = f"{skill_name} {block_type} teaching strategy example"
+        if subject:
+            query_text += f" {subject}"
+        return query_text
+    
+    async def _query_skill_examples(
+        self,
+        query_embedding: List[float],
+        subject: Optional[str],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Search instructional strategies near a skill query embedding"""
+        # Build filter for instructional resources
+        metadata_filter = {
+            'chunk_type': {'$eq': 'instructional_strategy'}
+        }
+        if subject:
+            metadata_filter['subject'] = {'$eq': subject}
+        
+        search_results = await asyncio.to_thread(
+            self._index.query,
+            vector=query_embedding,
+            top_k=top_k,
+            include_values=False,
+            include_metadata=True,
+            filter=metadata_filter
+        )
+        
+        # Process results
+        strategy_examples = []
+        for match in search_results.matches:
+            example = {
+                'id': match.id,
+                'score': match.score,
+                'content': match.metadata.get('content', ''),
+                'strategy_type': match.metadata.get('strategy_type', ''),
+                'skill': match.metadata.get('skill', ''),
+                'example_activity': match.metadata.get('example_activity', '')
+            }
+            strategy_examples.append(example)
+        
+        return strategy_examples
+    
     def health_check(self) -> bool:
         """Check if Pinecone connection is healthy"""
         try:
@@ -1,6 +1,8 @@
+import asyncio
 from typing import List, Dict, Any, Optional
 from app.config import settings
 from app.core.rag.embedder import text_embedder
+from app.core.rag.pinecone_index import index_exists
 from pinecone import Pinecone
 from app.utils.logging import get_logger
 
@@ -20,8 +22,7 @@ class ScaffoldResourceRetriever:
     def _initialize_pinecone(self):
         """Initialize Pinecone connection"""
         try:
-            indexes = self._pinecone.list_indexes().names()
-            if settings.pinecone_index_name in indexes:
+            if index_exists(self._pinecone, settings.pinecone_index_name):
                 self._index = self._pinecone.Index(settings.pinecone_index_name)
                 logger.info("Pinecone index connected for scaffold retrieval")
             else:
@@ -84,7 +85,8 @@ class ScaffoldResourceRetriever:
                 filter_condition["skill_name"] = {"$eq": skill_name.lower()}
             
             # Search in Pinecone
-            results = self._index.query(
+            results = await asyncio.to_thread(
+                self._index.query,
                 vector=query_embedding,
                 top_k=top_k,
                 include_values=False,
@@ -167,7 +169,8 @@ class ScaffoldResourceRetriever:
             }
             
             # Search in Pinecone
-            results = self._index.query(
+            results = await asyncio.to_thread(
+                self._index.query,
                 vector=query_embedding,
                 top_k=top_k,
                 include_values=False,
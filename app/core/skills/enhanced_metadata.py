@@ -1,12 +1,56 @@
-import json
-from typing import Dict, List, Optional
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+import numpy as np
 from pathlib import Path
+from app.core.skills.loader import load_json_file
 from app.models.lesson import SkillSpec
 from app.utils.exceptions import ValidationError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Display names for cognitive complexity levels
+COGNITIVE_LEVEL_DISPLAY_NAMES = {
+    "getting_started": "Getting Started",
+    "thinking_harder": "Thinking Harder",
+    "stretching_thinking": "Stretching Thinking"
+}
+
+# Skill preference weights per subject area (read-only, shared by all callers)
+# This could be enhanced with actual data analysis; for now, using logical preferences
+_SUBJECT_SKILL_PREFERENCES: Mapping[str, Mapping[str, float]] = MappingProxyType({
+    "Science": MappingProxyType({
+        "Categorise": 0.9,
+        "Compare": 0.8,
+        "Hypothesise": 0.9,
+        "Explain": 0.8,
+        "Verify": 0.7
+    }),
+    "Mathematics": MappingProxyType({
+        "Sequence": 0.9,
+        "Compare": 0.8,
+        "Categorise": 0.7,
+        "Judge": 0.6
+    }),
+    "History": MappingProxyType({
+        "Retrieve": 0.9,
+        "Validate": 0.8,
+        "New Perspective": 0.8,
+        "Explain": 0.7
+    }),
+    "English": MappingProxyType({
+        "Target Vocabulary": 0.9,
+        "Explain": 0.8,
+        "Elaborate": 0.8,
+        "Judge": 0.7
+    })
+})
+_NO_SUBJECT_PREFERENCES: Mapping[str, float] = MappingProxyType({})
+
+# Distinguishes "not cached yet" from a cached None in single-probe cache lookups
+_MISSING = object()
+
 
 class EnhancedSkillMetadataManager:
     """Enhanced skill metadata manager with framework guidance"""
@@ -20,101 +64,214 @@ class EnhancedSkillMetadataManager:
         self.skills_file_path = Path(skills_file_path)
         self.blocks_file_path = Path(blocks_file_path)
         self._skills_data: Optional[Dict] = None
-        self._blocks_data: Optional[Dict] = None
+        self._skill_index: Dict[str, Dict] = {}
+        self._skill_placement: Dict[str, Tuple[str, str]] = {}
+        self._all_skill_specs: Tuple[SkillSpec, ...] = ()
+        self._guidance_cache: Dict[Tuple[str, str, str], Optional[Dict]] = {}
+        self._difficulty_masks: Dict[str, np.ndarray] = {}
+        # Bumped on every (re)load so callers can drop caches aligned with the old skill order
+        self._version = 0
         self._load_data()
     
     def _load_data(self):
-        """Load enhanced skills and block definitions"""
+        """Load enhanced skills metadata (block definitions load on first use)
+
+        Calling this again reloads from disk: the shared parse cache and every
+        derived index are dropped, so changed files are picked up.
+        """
         try:
+            # On reload, drop the process-wide parse cache so the files are read again
+            if self._skills_data is not None:
+                load_json_file.cache_clear()
+            
             # Load skills metadata
-            with open(self.skills_file_path, 'r') as f:
-                self._skills_data = json.load(f)
+            self._skills_data = load_json_file(str(self.skills_file_path))
             
-            # Load block definitions
-            with open(self.blocks_file_path, 'r') as f:
-                self._blocks_data = json.load(f)
+            # Drop any previously loaded block definitions and their indexes so they are rebuilt lazily
+            for attr in ("_blocks_data", "_organizer_index", "_sentence_starters_index"):
+                self.__dict__.pop(attr, None)
             
-            logger.info("Enhanced skills and block metadata loaded successfully")
+            self._build_skill_index()
+            self._guidance_cache.clear()
+            self._difficulty_masks.clear()
+            self._version += 1
+            
+            logger.info("Enhanced skills metadata loaded successfully")
             
         except Exception as e:
             logger.error("Failed to load enhanced metadata", error=str(e))
             raise ValidationError(f"Failed to load enhanced metadata: {str(e)}")
     
-    def get_skill_with_framework_guidance(self, skill_name: str) -> Optional[Dict]:
-        """Get skill with full framework guidance"""
+    @cached_property
+    def _blocks_data(self) -> Dict:
+        """Block definitions, parsed on first access since selector-only paths never need them"""
+        try:
+            blocks_data = load_json_file(str(self.blocks_file_path))
+            logger.info("Block definitions loaded successfully")
+            return blocks_data
+            
+        except Exception as e:
+            logger.error("Failed to load block definitions", error=str(e))
+            raise ValidationError(f"Failed to load block definitions: {str(e)}")
+    
+    def _build_skill_index(self):
+        """Index skills by name, merged with their color category fields, and build their SkillSpecs"""
+        self._skill_index = {}
+        self._skill_placement = {}
+        all_skill_specs = []
         for color, color_data in self._skills_data.items():
             for skill_data in color_data["skills"]:
-                if skill_data["skill"] == skill_name:
-                    return {
+                skill_name = skill_data["skill"]
+                # First color listing a skill wins in both indexes, as with the original nested scans
+                if skill_name not in self._skill_index:
+                    self._skill_placement[skill_name] = (color, skill_data["block_type"])
+                    self._skill_index[skill_name] = {
                         **skill_data,
                         "color": color,
                         "category": color_data["category"],
                         "cognitive_purpose": color_data["cognitive_purpose"]
                     }
-        return None
+                all_skill_specs.append(SkillSpec(
+                    name=skill_data["skill"],
+                    color=color,
+                    block_type=skill_data["block_type"],
+                    example_question=skill_data["example_question"],
+                    description=skill_data["description"],
+                    icon_url=skill_data["icon_url"],
+                    media_suggestion=skill_data.get("media_suggestion")
+                ))
+        
+        self._all_skill_specs = tuple(all_skill_specs)
+        
+        # Column arrays aligned with _all_skill_specs for vectorized filtering (shared, so read-only)
+        self._skill_names = np.array([spec.name for spec in all_skill_specs])
+        self._skill_colors = np.array([spec.color for spec in all_skill_specs])
+        self._skill_block_types = np.array([spec.block_type for spec in all_skill_specs])
+        for column in (self._skill_names, self._skill_colors, self._skill_block_types):
+            column.flags.writeable = False
+    
+    @property
+    def version(self) -> int:
+        """Load counter, incremented each time the catalogue is (re)loaded"""
+        return self._version
+    
+    @property
+    def all_skill_specs(self) -> Tuple[SkillSpec, ...]:
+        """Every skill's SkillSpec, in metadata order (the order of the column arrays below)"""
+        return self._all_skill_specs
+    
+    @property
+    def skill_names(self) -> np.ndarray:
+        """Read-only array of skill names, aligned with all_skill_specs"""
+        return self._skill_names
+    
+    @property
+    def skill_colors(self) -> np.ndarray:
+        """Read-only array of skill colors, aligned with all_skill_specs"""
+        return self._skill_colors
+    
+    @property
+    def skill_block_types(self) -> np.ndarray:
+        """Read-only array of skill block types, aligned with all_skill_specs"""
+        return self._skill_block_types
+    
+    def get_difficulty_mask(self, difficulty_level: str) -> np.ndarray:
+        """Boolean array (aligned with _all_skill_specs) of skills with guidance for this difficulty level"""
+        mask = self._difficulty_masks.get(difficulty_level)
+        if mask is None:
+            mask = np.fromiter(
+                (bool(self.get_difficulty_guidance(spec.name, difficulty_level)) for spec in self._all_skill_specs),
+                dtype=bool,
+                count=len(self._all_skill_specs)
+            )
+            self._difficulty_masks[difficulty_level] = mask
+        return mask
+    
+    @cached_property
+    def _organizer_index(self) -> Tuple[Dict[str, Dict], Optional[Dict]]:
+        """Map each skill to its MapIt graphic organizer, plus the fallback (first) organizer"""
+        organizers = (self._blocks_data.get("MapIt") or {}).get("graphic_organizers") or {}
+        
+        organizer_for_skill: Dict[str, Dict] = {}
+        fallback_organizer = None
+        for org_name, org_info in organizers.items():
+            organizer = {
+                "name": org_name,
+                "use_case": org_info["use_case"],
+                "description": org_info["description"]
+            }
+            if fallback_organizer is None:
+                fallback_organizer = organizer
+            for skill_name in org_info.get("skills", []):
+                # First matching organizer wins, as with the original linear scan
+                organizer_for_skill.setdefault(skill_name, organizer)
+        
+        return organizer_for_skill, fallback_organizer
+    
+    @cached_property
+    def _sentence_starters_index(self) -> Dict[str, List[str]]:
+        """Map each skill to its SayIt sentence starters (skill scaffolds, else block-level starters)"""
+        block_starters = (self._blocks_data.get("SayIt") or {}).get("sentence_starters") or {}
+        
+        starters_for_skill: Dict[str, List[str]] = dict(block_starters)
+        for skill_name, skill_data in self._skill_index.items():
+            scaffolds = (skill_data.get("framework_guidance") or {}).get("student_scaffolds")
+            if scaffolds:
+                starters_for_skill[skill_name] = scaffolds
+        
+        return starters_for_skill
+    
+    def get_skill_with_framework_guidance(self, skill_name: str) -> Optional[Dict]:
+        """Get skill with full framework guidance"""
+        return self._skill_index.get(skill_name)
+    
+    def get_skill_placement(self, skill_name: str) -> Optional[Tuple[str, str]]:
+        """Get the (color, block_type) a skill belongs to, or None for unknown skills"""
+        return self._skill_placement.get(skill_name)
     
     def get_block_definition(self, block_type: str) -> Optional[Dict]:
         """Get complete block type definition"""
         return self._blocks_data.get(block_type)
     
+    def _get_skill_guidance(self, skill_name: str, section: str, key: str) -> Optional[Dict]:
+        """Memoized lookup of skill_data[section][key] (metadata is immutable after load)"""
+        cache_key = (skill_name, section, key)
+        guidance = self._guidance_cache.get(cache_key, _MISSING)
+        if guidance is not _MISSING:
+            return guidance
+        
+        guidance = None
+        skill_data = self._skill_index.get(skill_name)
+        if skill_data:
+            guidance = (skill_data.get(section) or {}).get(key)
+        
+        self._guidance_cache[cache_key] = guidance
+        return guidance
+    
     def get_subject_specific_guidance(self, skill_name: str, subject: str) -> Optional[Dict]:
         """Get subject-specific guidance for a skill"""
-        skill_data = self.get_skill_with_framework_guidance(skill_name)
-        if skill_data and "subject_applications" in skill_data:
-            return skill_data["subject_applications"].get(subject)
-        return None
+        return self._get_skill_guidance(skill_name, "subject_applications", subject)
     
     def get_difficulty_guidance(self, skill_name: str, difficulty_level: str) -> Optional[Dict]:
         """Get difficulty-specific guidance for a skill"""
-        skill_data = self.get_skill_with_framework_guidance(skill_name)
-        if skill_data and "difficulty_levels" in skill_data:
-            return skill_data["difficulty_levels"].get(difficulty_level)
-        return None
+        return self._get_skill_guidance(skill_name, "difficulty_levels", difficulty_level)
     
     def get_graphic_organizer_for_skill(self, skill_name: str, block_type: str) -> Optional[Dict]:
         """Get appropriate graphic organizer for a skill"""
         if block_type != "MapIt":
             return None
         
-        block_def = self.get_block_definition(block_type)
-        if not block_def or "graphic_organizers" not in block_def:
-            return None
-        
-        # Find organizer that matches the skill
-        for org_name, org_info in block_def["graphic_organizers"].items():
-            if skill_name in org_info.get("skills", []):
-                return {
-                    "name": org_name,
-                    "use_case": org_info["use_case"],
-                    "description": org_info["description"]
-                }
+        organizer_for_skill, fallback_organizer = self._organizer_index
         
         # Return first organizer as fallback
-        first_org = list(block_def["graphic_organizers"].items())[0]
-        return {
-            "name": first_org[0],
-            "use_case": first_org[1]["use_case"], 
-            "description": first_org[1]["description"]
-        }
+        return organizer_for_skill.get(skill_name) or fallback_organizer
     
     def get_sentence_starters_for_skill(self, skill_name: str, block_type: str) -> List[str]:
         """Get sentence starters for SayIt activities"""
         if block_type != "SayIt":
             return []
         
-        # First check skill-specific scaffolds
-        skill_data = self.get_skill_with_framework_guidance(skill_name)
-        if skill_data and "framework_guidance" in skill_data:
-            scaffolds = skill_data["framework_guidance"].get("student_scaffolds", [])
-            if scaffolds:
-                return scaffolds
-        
-        # Fallback to block-level sentence starters
-        block_def = self.get_block_definition(block_type)
-        if block_def and "sentence_starters" in block_def:
-            return block_def["sentence_starters"].get(skill_name, [])
-        
-        return []
+        return self._sentence_starters_index.get(skill_name, [])
     
     def map_difficulty_to_level(self, difficulty: float) -> str:
         """Map difficulty float to cognitive complexity level name
@@ -141,12 +298,10 @@ class EnhancedSkillMetadataManager:
         Returns:
             User-friendly display name
         """
-        display_names = {
-            "getting_started": "Getting Started",
-            "thinking_harder": "Thinking Harder",
-            "stretching_thinking": "Stretching Thinking"
-        }
-        return display_names.get(level, level.replace("_", " ").title())
+        display_name = COGNITIVE_LEVEL_DISPLAY_NAMES.get(level)
+        if display_name is None:
+            display_name = level.replace("_", " ").title()
+        return display_name
     
     def get_cognitive_complexity_guidance(self, skill_name: str, complexity_level: str) -> Optional[Dict]:
         """Get guidance for a specific cognitive complexity level of a skill
@@ -158,52 +313,11 @@ class EnhancedSkillMetadataManager:
         Returns:
             Dictionary containing guidance for the specified complexity level, or None if not found
         """
-        skill_data = self.get_skill_with_framework_guidance(skill_name)
-        if not skill_data:
-            return None
-            
-        # Check if skill has cognitive complexity levels defined
-        if "cognitive_complexity_levels" not in skill_data:
-            return None
-            
-        # Return guidance for the specified level
-        complexity_levels = skill_data["cognitive_complexity_levels"]
-        return complexity_levels.get(complexity_level)
-    
-    def get_skills_for_subject_preference(self, subject: str) -> Dict[str, float]:
-        """Get skill preferences based on subject area"""
-        
-        # This could be enhanced with actual data analysis
-        # For now, using logical preferences
-        preferences = {
-            "Science": {
-                "Categorise": 0.9,
-                "Compare": 0.8, 
-                "Hypothesise": 0.9,
-                "Explain": 0.8,
-                "Verify": 0.7
-            },
-            "Mathematics": {
-                "Sequence": 0.9,
-                "Compare": 0.8,
-                "Categorise": 0.7,
-                "Judge": 0.6
-            },
-            "History": {
-                "Retrieve": 0.9,
-                "Validate": 0.8,
-                "New Perspective": 0.8,
-                "Explain": 0.7
-            },
-            "English": {
-                "Target Vocabulary": 0.9,
-                "Explain": 0.8,
-                "Elaborate": 0.8,
-                "Judge": 0.7
-            }
-        }
-        
-        return preferences.get(subject, {})
+        return self._get_skill_guidance(skill_name, "cognitive_complexity_levels", complexity_level)
+    
+    def get_skills_for_subject_preference(self, subject: str) -> Mapping[str, float]:
+        """Get skill preferences based on subject area (read-only)"""
+        return _SUBJECT_SKILL_PREFERENCES.get(subject, _NO_SUBJECT_PREFERENCES)
 
 
 # Global instance
@@ -1,5 +1,9 @@
 import random
-from typing import List, Dict, Optional
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, List, Dict, Mapping, Optional, Tuple
+import numpy as np
 from app.core.skills.enhanced_metadata import enhanced_skill_metadata
 from app.utils.exceptions import SkillSelectionError
 from app.models.lesson import SkillSpec, GenerationContext
@@ -7,12 +11,45 @@ from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+_GRADE_NUMBER_RE = re.compile(r'\d+')
+
+# Position contexts are shared across calls and must not be mutated
+_OPENING_CTX = MappingProxyType({
+    "role": "opening",
+    "preferred_colors": frozenset(("Green", "Blue")),  # Starting skills
+    "avoid_colors": frozenset()
+})
+_CONCLUDING_CTX = MappingProxyType({
+    "role": "concluding",
+    "preferred_colors": frozenset(("Red", "Yellow")),  # Application/synthesis
+    "avoid_colors": frozenset()
+})
+_DEVELOPING_CTX = MappingProxyType({
+    "role": "developing",
+    "preferred_colors": frozenset(("Blue", "Yellow", "Orange")),  # Organizing/analyzing
+    "avoid_colors": frozenset()
+})
+
+
+@lru_cache(maxsize=64)
+def _extract_grade_number(grade: str) -> Optional[int]:
+    """Extract numeric grade level from grade string (e.g. "Year 5" -> 5)"""
+    if not grade or ('Year' not in grade and 'Grade' not in grade):
+        return None
+    
+    match = _GRADE_NUMBER_RE.search(grade)
+    return int(match.group()) if match else None
+
 
 class EnhancedSkillSelector:
     """Enhanced skill selector using framework structure and subject awareness"""
     
     def __init__(self):
         self.metadata = enhanced_skill_metadata
+        self._rng = np.random.default_rng()
+        # Read-only subject preference score arrays, aligned with the metadata skill order
+        self._subject_scores: Dict[Optional[str], np.ndarray] = {}
+        self._subject_scores_version = self.metadata.version
     
     def select_skills_for_lesson(
         self,
@@ -43,8 +80,8 @@ class EnhancedSkillSelector:
                 subject=subject
             )
             
-            # Get subject preferences
-            subject_preferences = self.metadata.get_skills_for_subject_preference(subject)
+            # Get subject preference scores (computed once per subject)
+            subject_scores = self._get_subject_scores(subject)
             
             # Get difficulty level for complexity guidance
             difficulty_level = self.metadata.map_difficulty_to_level(difficulty)
@@ -52,7 +89,7 @@ class EnhancedSkillSelector:
             # Select skills with cognitive progression awareness
             selected_skills = self._select_with_progression_logic(
                 step_count=step_count,
-                subject_preferences=subject_preferences,
+                subject_scores=subject_scores,
                 difficulty_level=difficulty_level,
                 preferred_blocks=preferred_blocks
             )
@@ -73,7 +110,7 @@ class EnhancedSkillSelector:
     def _select_with_progression_logic(
         self,
         step_count: int,
-        subject_preferences: Dict[str, float],
+        subject_scores: np.ndarray,
         difficulty_level: str,
         preferred_blocks: Optional[List[str]] = None
     ) -> List[SkillSpec]:
@@ -84,148 +121,129 @@ class EnhancedSkillSelector:
         
         all_skills = self._get_all_available_skills()
         selected_skills = []
+        selected_mask = np.zeros(len(all_skills), dtype=bool)
         
         for i in range(step_count):
             # Get context for this position
             position_context = self._get_position_context(i, step_count)
             
-            # Filter available skills
-            available_skills = self._filter_skills_for_position(
-                all_skills=all_skills,
+            # Filter available skill indices, with a selection score per kept skill
+            candidate_indices, selection_scores = self._filter_skills_for_position(
                 position_context=position_context,
-                subject_preferences=subject_preferences,
+                subject_scores=subject_scores,
                 difficulty_level=difficulty_level,
                 preferred_blocks=preferred_blocks,
                 position_index=i,
-                already_selected=[s.name for s in selected_skills]
+                already_selected=selected_mask
             )
             
-            if not available_skills:
-                # Fallback to any available skill
-                available_skills = [s for s in all_skills if s.name not in [sel.name for sel in selected_skills]]
+            if not candidate_indices.size:
+                # Fallback to any available skill, weighted by subject preference
+                candidate_indices = np.flatnonzero(~selected_mask)
+                selection_scores = subject_scores[candidate_indices]
             
-            if available_skills:
-                # Weight selection by subject preference
-                selected_skill = self._weighted_skill_selection(available_skills, subject_preferences)
-                selected_skills.append(selected_skill)
+            if candidate_indices.size:
+                selected_index = self._weighted_skill_selection(candidate_indices, selection_scores)
+                selected_skills.append(all_skills[selected_index])
+                selected_mask[selected_index] = True
         
         return selected_skills
     
-    def _get_position_context(self, position: int, total_steps: int) -> Dict[str, any]:
+    def _get_subject_scores(self, subject: str) -> np.ndarray:
+        """Get the subject preference score per skill index, built once per subject"""
+        if self._subject_scores_version != self.metadata.version:
+            # Catalogue reloaded - cached arrays no longer line up with the skill order
+            self._subject_scores.clear()
+            self._subject_scores_version = self.metadata.version
+        
+        subject_preferences = self.metadata.get_skills_for_subject_preference(subject)
+        # Subjects without preferences share one entry, so arbitrary subject strings don't grow the cache
+        cache_key = subject if subject_preferences else None
+        
+        scores = self._subject_scores.get(cache_key)
+        if scores is None:
+            skill_names = self.metadata.skill_names
+            scores = np.fromiter(
+                (subject_preferences.get(name, 0.5) for name in skill_names.tolist()),
+                dtype=np.float64,
+                count=len(skill_names)
+            )
+            scores.flags.writeable = False
+            self._subject_scores[cache_key] = scores
+        return scores
+    
+    def _get_position_context(self, position: int, total_steps: int) -> Mapping[str, Any]:
         """Get context about this position in the lesson sequence"""
         
         if position == 0:
-            return {
-                "role": "opening",
-                "preferred_colors": ["Green", "Blue"],  # Starting skills
-                "avoid_colors": []
-            }
+            return _OPENING_CTX
         elif position == total_steps - 1:
-            return {
-                "role": "concluding", 
-                "preferred_colors": ["Red", "Yellow"],  # Application/synthesis
-                "avoid_colors": []
-            }
+            return _CONCLUDING_CTX
         else:
-            return {
-                "role": "developing",
-                "preferred_colors": ["Blue", "Yellow", "Orange"],  # Organizing/analyzing
-                "avoid_colors": []
-            }
+            return _DEVELOPING_CTX
     
     def _filter_skills_for_position(
         self,
-        all_skills: List[SkillSpec],
-        position_context: Dict,
-        subject_preferences: Dict[str, float],
+        position_context: Mapping[str, Any],
+        subject_scores: np.ndarray,
         difficulty_level: str,
         preferred_blocks: Optional[List[str]],
         position_index: int,
-        already_selected: List[str]
-    ) -> List[SkillSpec]:
-        """Filter skills appropriate for this position"""
-        
-        filtered_skills = []
+        already_selected: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Filter skills appropriate for this position
         
-        for skill in all_skills:
-            # Skip already selected
-            if skill.name in already_selected:
-                continue
-            
-            # Check block type preference
-            if preferred_blocks and position_index < len(preferred_blocks):
-                if skill.block_type != preferred_blocks[position_index]:
-                    continue
-            
-            # Loose color preference (not strict filtering)
-            color_score = 1.0
-            if skill.color in position_context.get("preferred_colors", []):
-                color_score = 1.5  # Boost preferred colors
-            elif skill.color in position_context.get("avoid_colors", []):
-                color_score = 0.3  # Reduce avoided colors
-            
-            # Subject preference
-            subject_score = subject_preferences.get(skill.name, 0.5)
-            
-            # Difficulty appropriateness - check if skill has this difficulty level
-            difficulty_guidance = self.metadata.get_difficulty_guidance(skill.name, difficulty_level)
-            difficulty_score = 1.2 if difficulty_guidance else 0.8
-            
-            # Combined score
-            combined_score = color_score * subject_score * difficulty_score
-            
-            if combined_score > 0.4:  # Threshold for inclusion
-                skill._selection_score = combined_score  # Store for weighted selection
-                filtered_skills.append(skill)
+        All arrays are aligned with the metadata skill order (all_skill_specs).
         
-        return filtered_skills
-    
-    def _weighted_skill_selection(self, available_skills: List[SkillSpec], subject_preferences: Dict[str, float]) -> SkillSpec:
-        """Select skill using weighted probability"""
+        Returns:
+            Tuple of (skill_indices, selection_scores) aligned by position. Scores are
+            kept out of the SkillSpec objects since those are shared across requests.
+        """
+        colors = self.metadata.skill_colors
         
-        if len(available_skills) == 1:
-            return available_skills[0]
+        # Skip already selected
+        candidates = ~already_selected
         
-        # Use selection scores if available
-        if hasattr(available_skills[0], '_selection_score'):
-            weights = [getattr(skill, '_selection_score', 1.0) for skill in available_skills]
-        else:
-            # Fallback to subject preferences
-            weights = [subject_preferences.get(skill.name, 0.5) for skill in available_skills]
+        # Check block type preference
+        if preferred_blocks and position_index < len(preferred_blocks):
+            candidates &= self.metadata.skill_block_types == preferred_blocks[position_index]
         
-        # Weighted random selection
-        total_weight = sum(weights)
-        if total_weight == 0:
-            return random.choice(available_skills)
+        # Loose color preference (not strict filtering); preferred wins over avoided
+        color_scores = np.ones(len(colors))
+        if position_context["avoid_colors"]:
+            color_scores[np.isin(colors, list(position_context["avoid_colors"]))] = 0.3  # Reduce avoided colors
+        if position_context["preferred_colors"]:
+            color_scores[np.isin(colors, list(position_context["preferred_colors"]))] = 1.5  # Boost preferred colors
         
-        r = random.uniform(0, total_weight)
-        cumulative = 0
+        # Difficulty appropriateness - check if skill has this difficulty level
+        difficulty_scores = np.where(self.metadata.get_difficulty_mask(difficulty_level), 1.2, 0.8)
         
-        for skill, weight in zip(available_skills, weights):
-            cumulative += weight
-            if r <= cumulative:
-                return skill
+        # Combined score, with threshold for inclusion
+        combined_scores = color_scores * subject_scores * difficulty_scores
+        kept = np.flatnonzero(candidates & (combined_scores > 0.4))
         
-        return available_skills[-1]  # Fallback
+        return kept, combined_scores[kept]
     
-    def _get_all_available_skills(self) -> List[SkillSpec]:
-        """Get all available skills from enhanced metadata"""
-        all_skills = []
+    def _weighted_skill_selection(
+        self,
+        candidate_indices: np.ndarray,
+        selection_scores: np.ndarray
+    ) -> int:
+        """Select a skill index using weighted probability"""
         
-        for color, color_data in self.metadata._skills_data.items():
-            for skill_info in color_data["skills"]:
-                skill_spec = SkillSpec(
-                    name=skill_info["skill"],
-                    color=color,
-                    block_type=skill_info["block_type"],
-                    example_question=skill_info["example_question"],
-                    description=skill_info["description"],
-                    icon_url=skill_info["icon_url"],
-                    media_suggestion=skill_info.get("media_suggestion")
-                )
-                all_skills.append(skill_spec)
+        if len(candidate_indices) == 1:
+            return int(candidate_indices[0])
+        
+        # Weighted random selection
+        total = selection_scores.sum()
+        if total == 0:
+            return int(self._rng.choice(candidate_indices))
         
-        return all_skills
+        return int(self._rng.choice(candidate_indices, p=selection_scores / total))
+    
+    def _get_all_available_skills(self) -> Tuple[SkillSpec, ...]:
+        """Get all available skills from enhanced metadata (built once at load, read-only)"""
+        return self.metadata.all_skill_specs
     
     def select_complexity_level(
         self,
@@ -254,7 +272,7 @@ class EnhancedSkillSelector:
         base_level = self.metadata.map_difficulty_to_level(context.difficulty)
         
         # Adjust based on grade level
-        grade_number = self._extract_grade_number(context.grade)
+        grade_number = _extract_grade_number(context.grade)
         
         # Early grades (1-3) should use simpler complexity by default
         if grade_number and grade_number <= 3 and base_level == "stretching_thinking":
@@ -296,17 +314,6 @@ class EnhancedSkillSelector:
         
         return base_level
 
-    def _extract_grade_number(self, grade: str) -> Optional[int]:
-        """Extract numeric grade level from grade string"""
-        try:
-            if 'Year' in grade:
-                return int(''.join(filter(str.isdigit, grade)))
-            elif 'Grade' in grade:
-                return int(''.join(filter(str.isdigit, grade)))
-            return None
-        except (ValueError, TypeError):
-            return None
-
 
 # Global instance  
 enhanced_skill_selector = EnhancedSkillSelector()
\ No newline at end of file
@@ -0,0 +1,10 @@
+from functools import lru_cache
+
+# Skill icons are served from this CDN path as <color>_<skill_name>.svg
+ICON_URL_PREFIX = "https://cdn.structural-learning.com/icons/"
+
+
+@lru_cache(maxsize=2048)
+def icon_url_for(skill_name: str, color: str) -> str:
+    """Build (once per skill/color pair) the standard icon URL"""
+    return "".join((ICON_URL_PREFIX, color.lower(), "_", skill_name.lower().replace(" ", "_"), ".svg"))
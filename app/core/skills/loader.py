@@ -0,0 +1,25 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+try:
+    import orjson as _json  # Native parser, much faster on the metadata files
+except ImportError:
+    import json as _json
+
+
+@lru_cache(maxsize=8)
+def load_json_file(path: str) -> Dict:
+    """
+    Read and parse a JSON metadata file once per process
+    
+    Repeated manager instances (workers, tests) share the parsed object, so
+    callers must treat the returned data as read-only.
+    
+    Args:
+        path: Path to the JSON file
+        
+    Returns:
+        Parsed JSON content
+    """
+    return _json.loads(Path(path).read_bytes())
@@ -1,12 +1,15 @@
-import json
 from typing import Dict, List, Optional
 from pathlib import Path
+from app.core.skills.loader import load_json_file
 from app.models.lesson import SkillSpec
 from app.utils.exceptions import ValidationError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Position of each color in the loose cognitive progression
+_COLOR_RANK = {"Green": 0, "Blue": 1, "Yellow": 2, "Orange": 3, "Red": 4}
+
 
 class SkillMetadataManager:
     """Manages thinking skills metadata"""
@@ -17,105 +20,79 @@ class SkillMetadataManager:
         
         self.skills_file_path = Path(skills_file_path)
         self._skills_data: Optional[Dict] = None
+        self._skill_index: Dict[str, SkillSpec] = {}
+        self._skills_by_color: Dict[str, List[SkillSpec]] = {}
+        self._skills_by_block_type: Dict[str, List[SkillSpec]] = {}
         self._load_skills_data()
     
     def _load_skills_data(self):
         """Load skills data from JSON file"""
         try:
-            with open(self.skills_file_path, 'r') as f:
-                self._skills_data = json.load(f)
+            self._skills_data = load_json_file(str(self.skills_file_path))
+            self._build_skill_index()
             logger.info("Skills metadata loaded successfully", file_path=str(self.skills_file_path))
         except Exception as e:
             logger.error("Failed to load skills metadata", error=str(e))
             raise ValidationError(f"Failed to load skills metadata: {str(e)}")
     
-    def get_all_skills(self) -> Dict[str, List[SkillSpec]]:
-        """Get all skills organized by color category"""
-        skills_by_color = {}
-        
+    @staticmethod
+    def _make_spec(color: str, skill_data: Dict) -> SkillSpec:
+        """Build a SkillSpec from a raw skill entry of a color category"""
+        return SkillSpec(
+            skill_data["skill"],
+            color,
+            skill_data["block_type"],
+            skill_data["example_question"],
+            skill_data["description"],
+            skill_data["icon_url"],
+            skill_data.get("media_suggestion")
+        )
+    
+    def _build_skill_index(self):
+        """Build every SkillSpec once and index them by name, color and block type"""
+        self._skill_index = {}
+        self._skills_by_color = {}
+        self._skills_by_block_type = {}
         for color, color_data in self._skills_data.items():
-            skills = []
+            color_skills = self._skills_by_color[color] = []
             for skill_data in color_data["skills"]:
-                skill_spec = SkillSpec(
-                    name=skill_data["skill"],
-                    color=color,
-                    block_type=skill_data["block_type"],
-                    example_question=skill_data["example_question"],
-                    description=skill_data["description"],
-                    icon_url=skill_data["icon_url"],
-                    media_suggestion=skill_data.get("media_suggestion")
-                )
-                skills.append(skill_spec)
-            
-            skills_by_color[color] = skills
-        
-        return skills_by_color
+                skill_spec = self._make_spec(color, skill_data)
+                # First color listing a skill wins, as with the original linear scan
+                self._skill_index.setdefault(skill_spec.name, skill_spec)
+                color_skills.append(skill_spec)
+                self._skills_by_block_type.setdefault(skill_spec.block_type, []).append(skill_spec)
+    
+    def get_all_skills(self) -> Dict[str, List[SkillSpec]]:
+        """Get all skills organized by color category"""
+        return {color: list(skills) for color, skills in self._skills_by_color.items()}
     
     def get_skills_by_color(self, color: str) -> List[SkillSpec]:
         """Get all skills for a specific color category"""
-        if color not in self._skills_data:
+        skills = self._skills_by_color.get(color)
+        if skills is None:
             raise ValidationError(f"Unknown color category: {color}")
         
-        skills = []
-        for skill_data in self._skills_data[color]["skills"]:
-            skill_spec = SkillSpec(
-                name=skill_data["skill"],
-                color=color,
-                block_type=skill_data["block_type"],
-                example_question=skill_data["example_question"],
-                description=skill_data["description"],
-                icon_url=skill_data["icon_url"],
-                media_suggestion=skill_data.get("media_suggestion")
-            )
-            skills.append(skill_spec)
-        
-        return skills
+        return list(skills)
     
     def get_skill_by_name(self, skill_name: str) -> Optional[SkillSpec]:
         """Get a specific skill by name"""
-        for color, color_data in self._skills_data.items():
-            for skill_data in color_data["skills"]:
-                if skill_data["skill"] == skill_name:
-                    return SkillSpec(
-                        name=skill_data["skill"],
-                        color=color,
-                        block_type=skill_data["block_type"],
-                        example_question=skill_data["example_question"],
-                        description=skill_data["description"],
-                        icon_url=skill_data["icon_url"],
-                        media_suggestion=skill_data.get("media_suggestion")
-                    )
-        return None
+        return self._skill_index.get(skill_name)
     
     def get_skills_by_block_type(self, block_type: str) -> List[SkillSpec]:
         """Get all skills that map to a specific block type"""
-        skills = []
-        for color, color_data in self._skills_data.items():
-            for skill_data in color_data["skills"]:
-                if skill_data["block_type"] == block_type:
-                    skill_spec = SkillSpec(
-                        name=skill_data["skill"],
-                        color=color,
-                        block_type=skill_data["block_type"],
-                        example_question=skill_data["example_question"],
-                        description=skill_data["description"],
-                        icon_url=skill_data["icon_url"],
-                        media_suggestion=skill_data.get("media_suggestion")
-                    )
-                    skills.append(skill_spec)
-        
-        return skills
+        return list(self._skills_by_block_type.get(block_type, ()))
     
     def get_color_info(self, color: str) -> Dict:
         """Get information about a color category"""
-        if color not in self._skills_data:
+        color_data = self._skills_data.get(color)
+        if color_data is None:
             raise ValidationError(f"Unknown color category: {color}")
         
         return {
-            "category": self._skills_data[color]["category"],
-            "description": self._skills_data[color]["description"],
-            "usage": self._skills_data[color]["usage"],
-            "skill_count": len(self._skills_data[color]["skills"])
+            "category": color_data["category"],
+            "description": color_data["description"],
+            "usage": color_data["usage"],
+            "skill_count": len(color_data["skills"])
         }
     
     def validate_skill_sequence(self, skill_names: List[str]) -> bool:
@@ -123,7 +100,7 @@ class SkillMetadataManager:
         # Get colors for each skill
         skill_colors = []
         for skill_name in skill_names:
-            skill = self.get_skill_by_name(skill_name)
+            skill = self._skill_index.get(skill_name)
             if skill:
                 skill_colors.append(skill.color)
             else:
@@ -131,8 +108,7 @@ class SkillMetadataManager:
                 return False
         
         # Check for logical progression (loose validation)
-        color_order = ["Green", "Blue", "Yellow", "Orange", "Red"]
-        color_indices = [color_order.index(color) for color in skill_colors if color in color_order]
+        color_indices = [rank for rank in map(_COLOR_RANK.get, skill_colors) if rank is not None]
         
         # Allow some flexibility - just ensure we don't jump backwards too much
         for i in range(1, len(color_indices)):
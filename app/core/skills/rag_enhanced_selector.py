@@ -1,35 +1,239 @@
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 import random
+import threading
+from functools import lru_cache
+import numpy as np
 from pinecone import Pinecone
 from app.config import settings
 from app.core.rag.embedder import text_embedder
+from app.core.rag.pinecone_index import index_exists
+from app.core.skills.icons import icon_url_for
 from app.models.lesson import SkillSpec
 from app.utils.exceptions import SkillSelectionError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Color multipliers applied when scoring candidates for a lesson position
+_OPENING_COLOR_BOOST = {"Green": 2.0, "Blue": 1.5}
+_CLOSING_COLOR_BOOST = {"Red": 2.0, "Yellow": 1.5}
+_NO_COLOR_BOOST: Dict[str, float] = {}
+
+# Subject-specific skill preferences
+# These could be refined with curricular analysis
+_SUBJECT_PREFERENCES: Dict[str, Dict[str, float]] = {
+    "Science": {
+        "Categorise": 0.9,
+        "Compare": 0.8,
+        "Hypothesise": 0.9,
+        "Explain": 0.8,
+        "Sequence": 0.7
+    },
+    "Mathematics": {
+        "Sequence": 0.9,
+        "Compare": 0.8,
+        "Categorise": 0.7,
+        "Rank": 0.8
+    },
+    "English": {
+        "Explain": 0.9,
+        "Elaborate": 0.8,
+        "Target Vocabulary": 0.9,
+        "Adjectives": 0.8
+    },
+    "History": {
+        "Sequence": 0.9,
+        "Explain": 0.8,
+        "Compare": 0.7,
+        "New Perspective": 0.8
+    },
+    "Geography": {
+        "Categorise": 0.9,
+        "Compare": 0.8,
+        "Connect": 0.7,
+        "Explain": 0.7
+    }
+}
+_NO_PREFERENCES: Dict[str, float] = {}
+
+# Skill tables used to build SkillSpecs for RAG-discovered scaffold types
+_SCAFFOLD_TO_BLOCK: Dict[str, str] = {
+    "buildit": "BuildIt",
+    "sayit": "SayIt",
+    "mapit": "MapIt"
+}
+_BLOCK_TO_SCAFFOLD: Dict[str, str] = {block: scaffold for scaffold, block in _SCAFFOLD_TO_BLOCK.items()}
+_EASY_SCAFFOLD_SKILLS: Dict[str, Tuple[str, ...]] = {
+    "mapit": ("Identify", "Retrieve", "Recognize", "Find", "Point Out"),
+    "sayit": ("Name", "List", "Recall", "State", "Describe"),
+    "buildit": ("Sort", "Match", "Group", "Collect", "Arrange")
+}
+_STANDARD_SCAFFOLD_SKILLS: Dict[str, Tuple[str, ...]] = {
+    "mapit": ("Categorise", "Compare", "Sequence", "Rank", "Connect"),
+    "sayit": ("Explain", "Validate", "Exemplify", "Target Vocabulary", "Elaborate"),
+    "buildit": ("Hypothesise", "Judge", "Combine", "Imagine", "Integrate")
+}
+_ADVANCED_SCAFFOLD_SKILLS: Dict[str, Tuple[str, ...]] = {
+    "mapit": ("Analyze", "Synthesize", "Evaluate", "Compare", "Contrast"),
+    "sayit": ("Argue", "Defend", "Critique", "Justify", "Elaborate"),
+    "buildit": ("Design", "Create", "Innovate", "Construct", "Engineer")
+}
+_DEFAULT_SCAFFOLD_SKILLS: Tuple[str, ...] = ("Apply", "Analyze", "Create")
+_STANDARD_SCAFFOLD_COLORS: Dict[str, str] = {"mapit": "Blue", "sayit": "Yellow", "buildit": "Red"}
+_ADVANCED_SCAFFOLD_COLORS: Dict[str, str] = {"sayit": "Orange", "buildit": "Red"}
+
+_QUESTION_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "mapit": {
+        "categorise": "How can we group these items?",
+        "compare": "What are the similarities and differences?",
+        "sequence": "What is the correct order for these steps?",
+        "connect": "How are these concepts related?",
+        "identify": "What can you recognize in this information?"
+    },
+    "sayit": {
+        "explain": "Can you explain what's happening here?",
+        "validate": "What evidence supports this claim?",
+        "exemplify": "Can you give an example of this concept?",
+        "elaborate": "Can you add more detail to this idea?",
+        "target_vocabulary": "How would you use these key terms?"
+    },
+    "buildit": {
+        "hypothesise": "What do you predict will happen?",
+        "judge": "Which option do you think is best and why?",
+        "combine": "How can we merge these ideas?",
+        "imagine": "What if we tried a different approach?",
+        "integrate": "How can we bring these concepts together?"
+    }
+}
+_NO_TEMPLATES: Dict[str, str] = {}
+
+_SKILL_DESCRIPTIONS: Dict[str, str] = {
+    # Green skills (foundational)
+    "identify": "Recognize and point out specific elements or features",
+    "retrieve": "Remember and recall information from memory",
+    "recognize": "Notice and identify familiar patterns or objects", 
+    "find": "Locate and discover specific items or information",
+    "point out": "Show and indicate particular details",
+    "name": "Say the names of objects, people, or concepts",
+    "list": "Make a simple list of items or ideas",
+    "recall": "Remember and share what was learned before",
+    "state": "Say clearly and simply what you know",
+    "describe": "Tell about something using simple words",
+    "sort": "Put items into different groups",
+    "match": "Find things that go together or are the same",
+    "group": "Put similar items together",
+    "collect": "Gather items that belong together",
+    "arrange": "Put items in a helpful order",
+
+    # Standard skills
+    "categorise": "Sort items into groups based on shared characteristics",
+    "compare": "Identify similarities and differences between concepts", 
+    "sequence": "Arrange items in logical or chronological order",
+    "rank": "Order items by importance, value, or preference",
+    "connect": "Identify relationships and links between ideas",
+    "explain": "Communicate understanding clearly with supporting reasons",
+    "validate": "Provide evidence to support claims or ideas",
+    "exemplify": "Give specific examples to illustrate concepts",
+    "target vocabulary": "Use academic language accurately in context",
+    "elaborate": "Add detail and depth to ideas and explanations",
+    "hypothesise": "Make predictions based on evidence and reasoning",
+    "judge": "Evaluate options and make justified decisions",
+    "combine": "Merge different ideas or elements into something new",
+    "imagine": "Create new and innovative solutions or ideas",
+    "integrate": "Bring together concepts from different areas",
+
+    # Advanced skills
+    "analyze": "Break down complex ideas into smaller parts",
+    "synthesize": "Combine different elements to create new understanding",
+    "evaluate": "Assess the value or quality of ideas using criteria",
+    "argue": "Present a case with evidence and logical reasoning",
+    "defend": "Support ideas with strong evidence and reasoning",
+    "critique": "Examine strengths and weaknesses thoughtfully",
+    "justify": "Explain the reasons behind decisions or beliefs",
+    "design": "Plan and create solutions to complex problems",
+    "create": "Develop original ideas or products",
+    "innovate": "Develop new and creative approaches",
+    "construct": "Build understanding or solutions systematically",
+    "engineer": "Design and build solutions using systematic thinking"
+}
+
+
+def _score_skills(subject_boosts: np.ndarray, color_multipliers: np.ndarray, noise: np.ndarray) -> int:
+    """Return the index of the highest scoring candidate (first one wins ties)"""
+    scores = subject_boosts * color_multipliers
+    scores *= noise
+    return int(scores.argmax())
+
+
+@lru_cache(maxsize=256)
+def _example_question_for(skill_name: str, scaffold_type: str) -> str:
+    """Look up (once per skill/scaffold pair) the example question for a skill"""
+    templates = _QUESTION_TEMPLATES.get(scaffold_type, _NO_TEMPLATES)
+    return templates.get(skill_name.lower(), f"How can we use {skill_name} thinking here?")
+
+
+@lru_cache(maxsize=256)
+def _description_for(skill_name: str) -> str:
+    """Look up (once per skill) the description for a skill"""
+    return _SKILL_DESCRIPTIONS.get(skill_name.lower(), f"Apply {skill_name} thinking to develop understanding")
+
 
 class RAGEnhancedSkillSelector:
     """Skill selector that uses RAG to dynamically discover available skills"""
     
+    # Skills built from the static metadata, shared by all instances for the process lifetime
+    _ALL_SKILLS: Optional[List[SkillSpec]] = None
+    _SKILLS_BY_BLOCK_TYPE: Dict[str, List[SkillSpec]] = {}
+    _ALL_SKILLS_LOCK = threading.Lock()
+    
+    # Pinecone client and index handle, shared by all instances once connected
+    _PINECONE: Optional[Pinecone] = None
+    _INDEX = None
+    _PINECONE_LOCK = threading.Lock()
+    
+    # Process-wide instance, so the connection and query caches persist across requests
+    _instance: Optional["RAGEnhancedSkillSelector"] = None
+    _INSTANCE_LOCK = threading.Lock()
+    
+    def __new__(cls):
+        with cls._INSTANCE_LOCK:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instance = instance
+        return cls._instance
+    
     def __init__(self):
-        self._pinecone = Pinecone(api_key=settings.pinecone_api_key)
-        self._index = None
-        self._skills_cache = {}  # Cache discovered skills
-        self._initialize_pinecone()
+        with RAGEnhancedSkillSelector._INSTANCE_LOCK:
+            if self._initialized:
+                return
+            
+            self._pinecone: Optional[Pinecone] = None
+            self._index = None
+            self._skills_cache = {}  # Cache discovered skills
+            self._rng = np.random.default_rng()  # Noise for skill scoring, drawn per position in one call
+            self._initialize_pinecone()
+            self._initialized = True
     
     def _initialize_pinecone(self):
-        """Initialize Pinecone connection"""
-        try:
-            indexes = self._pinecone.list_indexes().names()
-            if settings.pinecone_index_name in indexes:
-                self._index = self._pinecone.Index(settings.pinecone_index_name)
-                logger.info("RAG skill selector connected to Pinecone")
-            else:
-                logger.warning(f"Pinecone index '{settings.pinecone_index_name}' not found")
-        except Exception as e:
-            logger.error("Failed to initialize Pinecone for skill selection", error=str(e))
+        """Initialize Pinecone connection, reusing the shared client and index if already connected"""
+        cls = RAGEnhancedSkillSelector
+        with cls._PINECONE_LOCK:
+            if cls._INDEX is None:
+                try:
+                    if cls._PINECONE is None:
+                        cls._PINECONE = Pinecone(api_key=settings.pinecone_api_key)
+                    
+                    if index_exists(cls._PINECONE, settings.pinecone_index_name):
+                        cls._INDEX = cls._PINECONE.Index(settings.pinecone_index_name)
+                        logger.info("RAG skill selector connected to Pinecone")
+                    else:
+                        logger.warning(f"Pinecone index '{settings.pinecone_index_name}' not found")
+                except Exception as e:
+                    logger.error("Failed to initialize Pinecone for skill selection", error=str(e))
+            
+            self._pinecone = cls._PINECONE
+            self._index = cls._INDEX
     
     async def select_skills_for_lesson(
         self,
@@ -78,10 +282,12 @@ class RAGEnhancedSkillSelector:
             
             # Select skills based on scaffold sequence
             selected_skills = []
+            selected_names: Set[str] = set()
+            skills_by_block_type = RAGEnhancedSkillSelector._SKILLS_BY_BLOCK_TYPE
             
             for i, block_type in enumerate(scaffold_sequence):
                 # Find skills that match this block type
-                matching_skills = [s for s in all_skills if s.block_type == block_type]
+                matching_skills = skills_by_block_type.get(block_type, [])
                 
                 if not matching_skills:
                     logger.warning(f"No skills found for block type: {block_type}")
@@ -93,24 +299,27 @@ class RAGEnhancedSkillSelector:
                     subject,
                     topic,
                     position=i,
-                    already_selected=[s.name for s in selected_skills],
+                    already_selected=selected_names,
                     difficulty=difficulty
                 )
                 
                 if selected_skill:
                     selected_skills.append(selected_skill)
+                    selected_names.add(selected_skill.name)
                 
-            # If we don't have enough skills, add more
-            while len(selected_skills) < step_count:
+            # If we don't have enough skills, add more in one draw
+            remaining = step_count - len(selected_skills)
+            if remaining > 0:
                 # Get skills that haven't been used yet
-                used_names = [s.name for s in selected_skills]
-                available_skills = [s for s in all_skills if s.name not in used_names]
+                available_skills = [s for s in all_skills if s.name not in selected_names]
                 
-                if not available_skills:
-                    available_skills = all_skills  # If all are used, allow repeats
-                
-                # Select a random skill
-                selected_skills.append(random.choice(available_skills))
+                if len(available_skills) >= remaining:
+                    selected_skills.extend(random.sample(available_skills, remaining))
+                else:
+                    # Use every unused skill, then allow repeats for the rest
+                    random.shuffle(available_skills)
+                    selected_skills.extend(available_skills)
+                    selected_skills.extend(random.choices(all_skills, k=remaining - len(available_skills)))
             
             logger.info(
                 "Enhanced skill selection completed",
@@ -128,10 +337,37 @@ class RAGEnhancedSkillSelector:
     def _ensure_correct_icon_url(self, skill_name: str, color: str) -> str:
         """Ensure the icon URL is correctly formatted for the skill and color"""
         # Standard format for icon URLs
-        return f"https://cdn.structural-learning.com/icons/{color.lower()}_{skill_name.lower().replace(' ', '_')}.svg"
+        return icon_url_for(skill_name, color)
 
+    @classmethod
+    def refresh_skills_cache(cls):
+        """Drop the cached skill list so it is rebuilt after enhanced metadata is reloaded"""
+        with cls._ALL_SKILLS_LOCK:
+            cls._ALL_SKILLS = None
+            cls._SKILLS_BY_BLOCK_TYPE = {}
+    
     def _get_all_skills_from_metadata(self) -> List[SkillSpec]:
-        """Get all available skills from the metadata with correct icon URLs"""
+        """Get all available skills from the metadata with correct icon URLs (built once)"""
+        all_skills = RAGEnhancedSkillSelector._ALL_SKILLS
+        if all_skills is not None:
+            return all_skills
+        
+        with RAGEnhancedSkillSelector._ALL_SKILLS_LOCK:
+            if RAGEnhancedSkillSelector._ALL_SKILLS is None:
+                all_skills = self._build_skills_from_metadata()
+                # Leave failures uncached so the next request retries
+                if all_skills:
+                    skills_by_block_type: Dict[str, List[SkillSpec]] = {}
+                    for skill in all_skills:
+                        skills_by_block_type.setdefault(skill.block_type, []).append(skill)
+                    # Publish the index first so readers that see _ALL_SKILLS also see it
+                    RAGEnhancedSkillSelector._SKILLS_BY_BLOCK_TYPE = skills_by_block_type
+                    RAGEnhancedSkillSelector._ALL_SKILLS = all_skills
+                return all_skills
+            return RAGEnhancedSkillSelector._ALL_SKILLS
+    
+    def _build_skills_from_metadata(self) -> List[SkillSpec]:
+        """Build SkillSpecs for every skill in the enhanced metadata"""
         try:
             # Import the enhanced metadata
             from app.core.skills.enhanced_metadata import enhanced_skill_metadata
@@ -170,14 +406,14 @@ class RAGEnhancedSkillSelector:
         subject: str,
         topic: str = None,
         position: int = 0,
-        already_selected: List[str] = None,
+        already_selected: Optional[Set[str]] = None,
         difficulty: float = 0.5
     ) -> Optional[SkillSpec]:
         """Select an appropriate skill for this position in the lesson"""
         if not matching_skills:
             return None
             
-        already_selected = already_selected or []
+        already_selected = already_selected or set()
         
         # Filter out already selected skills
         available_skills = [s for s in matching_skills if s.name not in already_selected]
@@ -188,81 +424,42 @@ class RAGEnhancedSkillSelector:
         # Get subject preferences
         subject_preferences = self._get_subject_preferences(subject)
         
-        # Calculate scores for each skill
-        skill_scores = []
-        for skill in available_skills:
-            # Base score
-            score = 1.0
-            
-            # Subject preference boost
-            subject_boost = subject_preferences.get(skill.name, 0.5)
-            score *= subject_boost
-            
-            # Position-based boost
-            if position == 0:
-                # For first position, prefer Green and Blue skills
-                if skill.color == "Green":
-                    score *= 2.0
-                elif skill.color == "Blue":
-                    score *= 1.5
-            elif position >= 2:  # Later positions
-                # For later positions, prefer Red and Yellow skills
-                if skill.color == "Red":
-                    score *= 2.0
-                elif skill.color == "Yellow":
-                    score *= 1.5
-            
-            # Add randomness to avoid repetition
-            score *= (0.8 + random.random() * 0.4)  # Between 0.8 and 1.2
-            
-            skill_scores.append((skill, score))
+        # Position-based boost
+        if position == 0:
+            # For first position, prefer Green and Blue skills
+            color_boost = _OPENING_COLOR_BOOST
+        elif position >= 2:  # Later positions
+            # For later positions, prefer Red and Yellow skills
+            color_boost = _CLOSING_COLOR_BOOST
+        else:
+            color_boost = _NO_COLOR_BOOST
         
-        # Sort by score and select the highest
-        skill_scores.sort(key=lambda x: x[1], reverse=True)
+        return self._pick_highest_scoring(available_skills, subject_preferences, color_boost)
+    
+    def _pick_highest_scoring(
+        self,
+        candidates: List[SkillSpec],
+        subject_preferences: Dict[str, float],
+        color_boost: Dict[str, float]
+    ) -> SkillSpec:
+        """Score all candidates at once (subject boost x color boost x noise) and return the best"""
+        count = len(candidates)
+        subject_boosts = np.fromiter(
+            (subject_preferences.get(skill.name, 0.5) for skill in candidates), dtype=np.float64, count=count
+        )
+        color_multipliers = np.fromiter(
+            (color_boost.get(skill.color, 1.0) for skill in candidates), dtype=np.float64, count=count
+        )
         
-        if skill_scores:
-            return skill_scores[0][0]
+        # Add randomness to avoid repetition
+        noise = self._rng.uniform(0.8, 1.2, count)
         
-        return random.choice(available_skills)
+        return candidates[_score_skills(subject_boosts, color_multipliers, noise)]
 
     def _get_subject_preferences(self, subject: str) -> Dict[str, float]:
-        """Get subject-specific skill preferences"""
-        # These could be refined with curricular analysis
-        subject_preferences = {
-            "Science": {
-                "Categorise": 0.9,
-                "Compare": 0.8,
-                "Hypothesise": 0.9,
-                "Explain": 0.8,
-                "Sequence": 0.7
-            },
-            "Mathematics": {
-                "Sequence": 0.9,
-                "Compare": 0.8,
-                "Categorise": 0.7,
-                "Rank": 0.8
-            },
-            "English": {
-                "Explain": 0.9,
-                "Elaborate": 0.8,
-                "Target Vocabulary": 0.9,
-                "Adjectives": 0.8
-            },
-            "History": {
-                "Sequence": 0.9,
-                "Explain": 0.8,
-                "Compare": 0.7,
-                "New Perspective": 0.8
-            },
-            "Geography": {
-                "Categorise": 0.9,
-                "Compare": 0.8,
-                "Connect": 0.7,
-                "Explain": 0.7
-            }
-        }
-        
-        return subject_preferences.get(subject, {})
+        """Get subject-specific skill preferences (shared table, treat as read-only)"""
+        return _SUBJECT_PREFERENCES.get(subject, _NO_PREFERENCES)
+    
     def _select_appropriate_skill(
         self,
         matching_skills: List[SkillSpec],
@@ -275,7 +472,8 @@ class RAGEnhancedSkillSelector:
         """Select an appropriate skill for this position"""
         
         # Avoid repeating skills
-        unused_skills = [s for s in matching_skills if s.name not in [skill.name for skill in already_selected]]
+        used_names = {skill.name for skill in already_selected}
+        unused_skills = [s for s in matching_skills if s.name not in used_names]
         if not unused_skills:
             unused_skills = matching_skills  # If all are used, allow repeats
         
@@ -285,40 +483,18 @@ class RAGEnhancedSkillSelector:
         # Adjust preferences based on position
         if position == 0:
             # Prefer Green or Blue skills for first position
-            color_boost = {"Green": 2.0, "Blue": 1.5}
+            color_boost = _OPENING_COLOR_BOOST
         elif position == len(already_selected):
             # Prefer Red or Yellow skills for last position
-            color_boost = {"Red": 2.0, "Yellow": 1.5}
+            color_boost = _CLOSING_COLOR_BOOST
         else:
             # No strong color preference for middle positions
-            color_boost = {}
+            color_boost = _NO_COLOR_BOOST
         
-        # Calculate scores for each skill
-        skill_scores = []
-        for skill in unused_skills:
-            # Base score
-            score = 1.0
-            
-            # Boost based on subject preferences
-            subject_boost = subject_preferences.get(skill.name, 0.5)
-            score *= subject_boost
-            
-            # Boost based on position/color
-            color_multiplier = color_boost.get(skill.color, 1.0)
-            score *= color_multiplier
-            
-            # Add a random factor to avoid always picking the same skills
-            score *= (0.8 + random.random() * 0.4)  # Random factor between 0.8 and 1.2
-            
-            skill_scores.append((skill, score))
-        
-        # Sort by score and select the best
-        skill_scores.sort(key=lambda x: x[1], reverse=True)
-        
-        if skill_scores:
-            return skill_scores[0][0]
+        if not unused_skills:
+            return None
         
-        return None
+        return self._pick_highest_scoring(unused_skills, subject_preferences, color_boost)
 
     def _determine_needed_scaffolds(
         self, 
@@ -414,48 +590,29 @@ class RAGEnhancedSkillSelector:
             return {}
     
     def _extract_skills_from_results(self, results, scaffold_type: str, difficulty: float = 0.5, total_steps: int = 3) -> List[SkillSpec]:
-        """Extract skill specifications from Pinecone results"""
+        """Extract skill specifications from the Pinecone matches for one scaffold type"""
         skills = []
         
         # Map scaffold types to block types
-        scaffold_to_block = {
-            "buildit": "BuildIt",
-            "sayit": "SayIt", 
-            "mapit": "MapIt"
-        }
-        
-        block_type = scaffold_to_block.get(scaffold_type, scaffold_type.title())
+        block_type = _SCAFFOLD_TO_BLOCK.get(scaffold_type) or scaffold_type.title()
         
         # Define thinking skills based on difficulty and scaffold
         if difficulty <= 0.25:  # Green skills for very easy
-            skill_mappings = {
-                "mapit": ["Identify", "Retrieve", "Recognize", "Find", "Point Out"],
-                "sayit": ["Name", "List", "Recall", "State", "Describe"],
-                "buildit": ["Sort", "Match", "Group", "Collect", "Arrange"]
-            }
+            skill_mappings = _EASY_SCAFFOLD_SKILLS
             # For very low difficulty, all skills should be Green
             base_color = "Green"
             
         elif difficulty >= 0.8:  # More advanced skills
-            skill_mappings = {
-                "mapit": ["Analyze", "Synthesize", "Evaluate", "Compare", "Contrast"],
-                "sayit": ["Argue", "Defend", "Critique", "Justify", "Elaborate"], 
-                "buildit": ["Design", "Create", "Innovate", "Construct", "Engineer"]
-            }
+            skill_mappings = _ADVANCED_SCAFFOLD_SKILLS
             # For high difficulty, use advanced colors
-            base_color = "Orange" if scaffold_type == "sayit" else ("Red" if scaffold_type == "buildit" else "Yellow")
+            base_color = _ADVANCED_SCAFFOLD_COLORS.get(scaffold_type, "Yellow")
             
         else:  # Standard skills
-            skill_mappings = {
-                "mapit": ["Categorise", "Compare", "Sequence", "Rank", "Connect"],
-                "sayit": ["Explain", "Validate", "Exemplify", "Target Vocabulary", "Elaborate"],
-                "buildit": ["Hypothesise", "Judge", "Combine", "Imagine", "Integrate"]
-            }
+            skill_mappings = _STANDARD_SCAFFOLD_SKILLS
             # Standard color mapping
-            color_map = {"mapit": "Blue", "sayit": "Yellow", "buildit": "Red"}
-            base_color = color_map.get(scaffold_type, "Blue")
+            base_color = _STANDARD_SCAFFOLD_COLORS.get(scaffold_type, "Blue")
         
-        available_skills = skill_mappings.get(scaffold_type, ["Apply", "Analyze", "Create"])
+        available_skills = skill_mappings.get(scaffold_type, _DEFAULT_SCAFFOLD_SKILLS)
         
         # Create skill specs for each available skill (up to 5)
         for i, skill_name in enumerate(available_skills[:5]):
@@ -514,86 +671,11 @@ class RAGEnhancedSkillSelector:
     
     def _generate_example_question(self, skill_name: str, scaffold_type: str) -> str:
         """Generate example question based on skill and scaffold"""
-        question_templates = {
-            "mapit": {
-                "categorise": "How can we group these items?",
-                "compare": "What are the similarities and differences?",
-                "sequence": "What is the correct order for these steps?",
-                "connect": "How are these concepts related?",
-                "identify": "What can you recognize in this information?"
-            },
-            "sayit": {
-                "explain": "Can you explain what's happening here?",
-                "validate": "What evidence supports this claim?",
-                "exemplify": "Can you give an example of this concept?",
-                "elaborate": "Can you add more detail to this idea?",
-                "target_vocabulary": "How would you use these key terms?"
-            },
-            "buildit": {
-                "hypothesise": "What do you predict will happen?",
-                "judge": "Which option do you think is best and why?",
-                "combine": "How can we merge these ideas?",
-                "imagine": "What if we tried a different approach?",
-                "integrate": "How can we bring these concepts together?"
-            }
-        }
-        
-        templates = question_templates.get(scaffold_type, {})
-        return templates.get(skill_name.lower(), f"How can we use {skill_name} thinking here?")
+        return _example_question_for(skill_name, scaffold_type)
     
     def _generate_description_for_skill(self, skill_name: str, scaffold_type: str) -> str:
         """Generate appropriate description for skill"""
-        descriptions = {
-            # Green skills (foundational)
-            "identify": "Recognize and point out specific elements or features",
-            "retrieve": "Remember and recall information from memory",
-            "recognize": "Notice and identify familiar patterns or objects", 
-            "find": "Locate and discover specific items or information",
-            "point out": "Show and indicate particular details",
-            "name": "Say the names of objects, people, or concepts",
-            "list": "Make a simple list of items or ideas",
-            "recall": "Remember and share what was learned before",
-            "state": "Say clearly and simply what you know",
-            "describe": "Tell about something using simple words",
-            "sort": "Put items into different groups",
-            "match": "Find things that go together or are the same",
-            "group": "Put similar items together",
-            "collect": "Gather items that belong together",
-            "arrange": "Put items in a helpful order",
-            
-            # Standard skills
-            "categorise": "Sort items into groups based on shared characteristics",
-            "compare": "Identify similarities and differences between concepts", 
-            "sequence": "Arrange items in logical or chronological order",
-            "rank": "Order items by importance, value, or preference",
-            "connect": "Identify relationships and links between ideas",
-            "explain": "Communicate understanding clearly with supporting reasons",
-            "validate": "Provide evidence to support claims or ideas",
-            "exemplify": "Give specific examples to illustrate concepts",
-            "target vocabulary": "Use academic language accurately in context",
-            "elaborate": "Add detail and depth to ideas and explanations",
-            "hypothesise": "Make predictions based on evidence and reasoning",
-            "judge": "Evaluate options and make justified decisions",
-            "combine": "Merge different ideas or elements into something new",
-            "imagine": "Create new and innovative solutions or ideas",
-            "integrate": "Bring together concepts from different areas",
-            
-            # Advanced skills
-            "analyze": "Break down complex ideas into smaller parts",
-            "synthesize": "Combine different elements to create new understanding",
-            "evaluate": "Assess the value or quality of ideas using criteria",
-            "argue": "Present a case with evidence and logical reasoning",
-            "defend": "Support ideas with strong evidence and reasoning",
-            "critique": "Examine strengths and weaknesses thoughtfully",
-            "justify": "Explain the reasons behind decisions or beliefs",
-            "design": "Plan and create solutions to complex problems",
-            "create": "Develop original ideas or products",
-            "innovate": "Develop new and creative approaches",
-            "construct": "Build understanding or solutions systematically",
-            "engineer": "Design and build solutions using systematic thinking"
-        }
-        
-        return descriptions.get(skill_name.lower(), f"Apply {skill_name} thinking to develop understanding")
+        return _description_for(skill_name)
     
     async def _select_with_rag_progression(
         self,
@@ -606,7 +688,37 @@ class RAGEnhancedSkillSelector:
     ) -> List[SkillSpec]:
         """Select skills with cognitive progression using RAG-discovered skills"""
         
+        # Plan every position's scaffold up front; only the picks depend on earlier picks
+        target_scaffolds = self._plan_scaffold_sequence(available_skills, step_count, difficulty, preferred_blocks)
+        
         selected_skills = []
+        selected_names: Set[str] = set()
+        
+        for target_scaffold in target_scaffolds:
+            # Select skill from target scaffold
+            skill = self._select_skill_from_scaffold_simple(
+                available_skills=available_skills,
+                target_scaffold=target_scaffold,
+                already_selected=selected_names
+            )
+            
+            if skill:
+                selected_skills.append(skill)
+                selected_names.add(skill.name)
+                logger.info(f"Selected skill: {skill.name} ({skill.block_type})")
+            else:
+                logger.warning(f"No skill found for scaffold: {target_scaffold}")
+            
+        return selected_skills
+    
+    def _plan_scaffold_sequence(
+        self,
+        available_skills: Dict[str, List[SkillSpec]],
+        step_count: int,
+        difficulty: float,
+        preferred_blocks: Optional[List[str]]
+    ) -> List[str]:
+        """Determine the target scaffold type for each lesson position"""
         
         # Define preferred progression for different contexts (only used if no preferred_blocks)
         if difficulty <= 0.3:
@@ -616,18 +728,16 @@ class RAGEnhancedSkillSelector:
         else:
             default_progression = ["sayit", "buildit", "mapit"]  # Advanced thinking first
         
+        available_scaffolds = list(available_skills.keys())
+        target_scaffolds = []
+        
         for i in range(step_count):
             # Determine target scaffold type
             if preferred_blocks and i < len(preferred_blocks):
                 # Convert preferred block names to lowercase scaffold format
                 block_name = preferred_blocks[i]
-                if block_name == "MapIt":
-                    target_scaffold = "mapit"
-                elif block_name == "SayIt":
-                    target_scaffold = "sayit"
-                elif block_name == "BuildIt":
-                    target_scaffold = "buildit"
-                else:
+                target_scaffold = _BLOCK_TO_SCAFFOLD.get(block_name)
+                if target_scaffold is None:
                     # Fallback for any other format
                     target_scaffold = block_name.lower().replace("it", "")
                 
@@ -638,30 +748,18 @@ class RAGEnhancedSkillSelector:
                 logger.info(f"Using default progression: {target_scaffold}")
             else:
                 # Cycle through available scaffolds
-                available_scaffolds = list(available_skills.keys())
                 target_scaffold = available_scaffolds[i % len(available_scaffolds)]
                 logger.info(f"Cycling through available: {target_scaffold}")
             
-            # Select skill from target scaffold
-            skill = self._select_skill_from_scaffold_simple(
-                available_skills=available_skills,
-                target_scaffold=target_scaffold,
-                already_selected=[s.name for s in selected_skills]
-            )
-            
-            if skill:
-                selected_skills.append(skill)
-                logger.info(f"Selected skill: {skill.name} ({skill.block_type})")
-            else:
-                logger.warning(f"No skill found for scaffold: {target_scaffold}")
-            
-        return selected_skills
+            target_scaffolds.append(target_scaffold)
+        
+        return target_scaffolds
     
     def _select_skill_from_scaffold_simple(
         self,
         available_skills: Dict[str, List[SkillSpec]],
         target_scaffold: str,
-        already_selected: List[str]
+        already_selected: Set[str]
     ) -> Optional[SkillSpec]:
         """Select a skill from target scaffold type without additional API calls"""
         
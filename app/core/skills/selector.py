@@ -1,5 +1,5 @@
 import random
-from typing import List, Dict, Optional
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
 from app.core.skills.metadata import skill_metadata
 from app.models.lesson import SkillSpec
 from app.utils.exceptions import SkillSelectionError
@@ -7,12 +7,69 @@ from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Loose cognitive progression of color categories
+_COLOR_PROGRESSION = ("Green", "Blue", "Yellow", "Orange", "Red")
+
+# Color categories per difficulty tier, kept in progression order
+_COLORS_EASY = ("Green", "Blue")  # Easy - focus on foundational skills
+_COLORS_MEDIUM_EASY = ("Green", "Blue", "Yellow")  # Medium-easy - add some critical thinking
+_COLORS_MEDIUM_HARD = ("Blue", "Yellow", "Orange", "Red")  # Medium-hard - include language and application
+_COLORS_HARD = ("Yellow", "Orange", "Red")  # Hard - focus on higher-order thinking
+
+# Membership sets for each tier, so progression filtering does O(1) lookups
+_COLOR_TIER_SETS: Dict[Tuple[str, ...], FrozenSet[str]] = {
+    tier: frozenset(tier)
+    for tier in (_COLORS_EASY, _COLORS_MEDIUM_EASY, _COLORS_MEDIUM_HARD, _COLORS_HARD)
+}
+
 
 class SkillSelector:
     """Selects appropriate thinking skills based on lesson parameters"""
     
     def __init__(self):
         self.metadata = skill_metadata
+        self._build_skill_pools()
+    
+    def _build_skill_pools(self):
+        """Precompute read-only skill pools by color and by (color, block type)"""
+        self._by_color: Dict[str, Tuple[SkillSpec, ...]] = {}
+        self._by_color_block: Dict[Tuple[str, str], Tuple[SkillSpec, ...]] = {}
+        
+        by_color_block: Dict[Tuple[str, str], List[SkillSpec]] = {}
+        for color, color_skills in self.metadata.get_all_skills().items():
+            self._by_color[color] = tuple(color_skills)
+            for skill in color_skills:
+                by_color_block.setdefault((color, skill.block_type), []).append(skill)
+        
+        self._by_color_block = {key: tuple(skills) for key, skills in by_color_block.items()}
+        
+        # Candidate pools per (target colors, preferred block), filled on first use
+        self._candidate_pools: Dict[Tuple[Tuple[str, ...], Optional[str]], Tuple[SkillSpec, ...]] = {}
+    
+    def _candidate_pool(self, target_colors: Tuple[str, ...], preferred_block: Optional[str]) -> Tuple[SkillSpec, ...]:
+        """Get the combined skill pool for a step's target colors and preferred block"""
+        key = (target_colors, preferred_block)
+        pool = self._candidate_pools.get(key)
+        if pool is None:
+            if preferred_block is not None:
+                pool = tuple(
+                    skill
+                    for color in target_colors
+                    for skill in self._by_color_block.get((color, preferred_block), ())
+                )
+            else:
+                pool = tuple(skill for color in target_colors for skill in self._by_color[color])
+            self._candidate_pools[key] = pool
+        return pool
+    
+    @staticmethod
+    def _draw_unused(pool: Tuple[SkillSpec, ...], used_skills: Set[str]) -> Optional[SkillSpec]:
+        """Draw a random skill from the pool that has not been used yet"""
+        # One shuffled draw of the pool; the first unused skill is a uniform pick among unused ones
+        for skill in random.sample(pool, len(pool)):
+            if skill.name not in used_skills:
+                return skill
+        return None
     
     def select_skills_for_lesson(
         self, 
@@ -58,42 +115,41 @@ class SkillSelector:
             logger.error("Error selecting skills", error=str(e))
             raise SkillSelectionError(f"Failed to select skills: {str(e)}")
     
-    def _get_colors_for_difficulty(self, difficulty: float) -> List[str]:
-        """Determine which color categories are appropriate for difficulty level"""
+    def _get_colors_for_difficulty(self, difficulty: float) -> Tuple[str, ...]:
+        """Determine which color categories are appropriate for difficulty level (shared, read-only)"""
         # Map difficulty to color combinations
-        if difficulty <= 0.3:  # Easy - focus on foundational skills
-            return ["Green", "Blue"]
-        elif difficulty <= 0.5:  # Medium-easy - add some critical thinking
-            return ["Green", "Blue", "Yellow"]
-        elif difficulty <= 0.7:  # Medium-hard - include language and application
-            return ["Blue", "Yellow", "Orange", "Red"]
-        else:  # Hard - focus on higher-order thinking
-            return ["Yellow", "Orange", "Red"]
+        if difficulty <= 0.3:
+            return _COLORS_EASY
+        elif difficulty <= 0.5:
+            return _COLORS_MEDIUM_EASY
+        elif difficulty <= 0.7:
+            return _COLORS_MEDIUM_HARD
+        else:
+            return _COLORS_HARD
     
     def _select_progressive_skills(
         self, 
-        available_colors: List[str], 
+        available_colors: Tuple[str, ...], 
         step_count: int,
         preferred_blocks: Optional[List[str]] = None
     ) -> List[SkillSpec]:
         """Select skills following cognitive progression"""
         
-        # Define progression logic (loose ordering)
-        color_progression = ["Green", "Blue", "Yellow", "Orange", "Red"]
-        
-        # Filter available colors to maintain some progression
-        ordered_colors = [color for color in color_progression if color in available_colors]
+        # Filter available colors to maintain some progression (loose ordering)
+        available_set = _COLOR_TIER_SETS.get(available_colors) or frozenset(available_colors)
+        ordered_colors = tuple(color for color in _COLOR_PROGRESSION if color in available_set)
         
         selected_skills = []
+        used_skills: Set[str] = set()
         
         for i in range(step_count):
             # Determine color for this step
-            if i == 0 and "Green" in ordered_colors:
+            if i == 0 and "Green" in available_set:
                 # First step - prefer Green for starting
-                target_colors = ["Green"]
-            elif i == step_count - 1 and "Red" in ordered_colors:
+                target_colors = ("Green",)
+            elif i == step_count - 1 and "Red" in available_set:
                 # Last step - prefer Red for application
-                target_colors = ["Red"]
+                target_colors = ("Red",)
             else:
                 # Middle steps - use progression logic
                 if i < len(ordered_colors):
@@ -106,71 +162,42 @@ class SkillSelector:
                 target_colors, 
                 preferred_blocks, 
                 i,
-                selected_skills
+                used_skills
             )
             
+            if not skill:
+                # Fallback - select any available skill
+                skill = self._select_fallback_skill(available_colors, used_skills)
+            
             if skill:
                 selected_skills.append(skill)
-            else:
-                # Fallback - select any available skill
-                fallback_skill = self._select_fallback_skill(available_colors, selected_skills)
-                if fallback_skill:
-                    selected_skills.append(fallback_skill)
+                used_skills.add(skill.name)
         
         return selected_skills
     
     def _select_skill_from_colors(
         self, 
-        target_colors: List[str], 
+        target_colors: Sequence[str], 
         preferred_blocks: Optional[List[str]],
         step_index: int,
-        already_selected: List[SkillSpec]
+        used_skills: Set[str]
     ) -> Optional[SkillSpec]:
-        """Select a skill from target colors"""
-        
-        # Get already used skill names to avoid repetition
-        used_skills = {skill.name for skill in already_selected}
-        
-        # Collect candidate skills
-        candidates = []
-        for color in target_colors:
-            color_skills = self.metadata.get_skills_by_color(color)
-            
-            # Filter by preferred blocks if specified
-            if preferred_blocks and step_index < len(preferred_blocks):
-                preferred_block = preferred_blocks[step_index]
-                color_skills = [s for s in color_skills if s.block_type == preferred_block]
-            
-            # Filter out already used skills
-            color_skills = [s for s in color_skills if s.name not in used_skills]
-            
-            candidates.extend(color_skills)
+        """Select an unused skill from target colors"""
         
-        # Select randomly from candidates
-        if candidates:
-            return random.choice(candidates)
+        # Preferred block for this step, if specified
+        preferred_block = None
+        if preferred_blocks and step_index < len(preferred_blocks):
+            preferred_block = preferred_blocks[step_index]
         
-        return None
+        return self._draw_unused(self._candidate_pool(tuple(target_colors), preferred_block), used_skills)
     
     def _select_fallback_skill(
         self, 
-        available_colors: List[str], 
-        already_selected: List[SkillSpec]
+        available_colors: Sequence[str], 
+        used_skills: Set[str]
     ) -> Optional[SkillSpec]:
-        """Select any available skill as fallback"""
-        
-        used_skills = {skill.name for skill in already_selected}
-        
-        all_candidates = []
-        for color in available_colors:
-            color_skills = self.metadata.get_skills_by_color(color)
-            color_skills = [s for s in color_skills if s.name not in used_skills]
-            all_candidates.extend(color_skills)
-        
-        if all_candidates:
-            return random.choice(all_candidates)
-        
-        return None
+        """Select any unused skill from the available colors as fallback"""
+        return self._draw_unused(self._candidate_pool(tuple(available_colors), None), used_skills)
     
     def get_skills_by_block_type(self, block_type: str) -> List[SkillSpec]:
         """Get all skills that map to a specific block type"""
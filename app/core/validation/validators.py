@@ -1,12 +1,119 @@
 import json
+import re
 import jsonschema
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Iterator, List, Mapping, Optional
 from pathlib import Path
 from app.utils.exceptions import ValidationError
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Mapping based on Structural Learning framework
+_SKILL_TO_BLOCKS: Mapping[str, FrozenSet[str]] = MappingProxyType({
+    # Green skills - typically MapIt
+    "Identify": frozenset({"MapIt"}),
+    "Retrieve": frozenset({"MapIt", "SayIt"}),
+    "Eliminate": frozenset({"MapIt"}),
+    "Extract": frozenset({"MapIt"}),
+
+    # Blue skills - typically MapIt
+    "Categorise": frozenset({"MapIt"}),
+    "Compare": frozenset({"MapIt"}),
+    "Rank": frozenset({"MapIt"}),
+    "Sequence": frozenset({"MapIt"}),
+    "Connect": frozenset({"MapIt"}),
+
+    # Yellow skills - typically SayIt
+    "Explain": frozenset({"SayIt"}),
+    "Validate": frozenset({"SayIt"}),
+    "Exemplify": frozenset({"SayIt"}),
+    "Verify": frozenset({"SayIt"}),
+    "Amplify": frozenset({"SayIt"}),
+
+    # Orange skills - typically SayIt
+    "Verbs": frozenset({"SayIt"}),
+    "Adverbs": frozenset({"SayIt"}),
+    "Adjectives": frozenset({"SayIt"}),
+    "Conjunctions": frozenset({"SayIt"}),
+    "Prepositions": frozenset({"SayIt"}),
+    "Target Vocabulary": frozenset({"SayIt"}),
+
+    # Red skills - typically BuildIt
+    "Hypothesise": frozenset({"BuildIt"}),
+    "Judge": frozenset({"BuildIt"}),
+    "Combine": frozenset({"BuildIt"}),
+    "Imagine": frozenset({"BuildIt"}),
+    "Designate": frozenset({"BuildIt"}),
+    "Summarise": frozenset({"SayIt", "BuildIt"}),  # Can be either
+    "Generate Questions": frozenset({"SayIt", "BuildIt"}),
+    "Integrate": frozenset({"BuildIt"}),
+    "Generalise": frozenset({"SayIt", "BuildIt"}),
+    "Complete": frozenset({"BuildIt"}),
+    "Elaborate": frozenset({"SayIt", "BuildIt"}),
+    "New Perspective": frozenset({"SayIt", "BuildIt"}),
+    "Infer": frozenset({"SayIt", "BuildIt"})
+})
+_ANY_BLOCK_TYPE: FrozenSet[str] = frozenset()
+
+# Loose cognitive level per skill color; unknown colors count as the middle level
+_COLOR_ORDER: Mapping[str, int] = MappingProxyType({
+    'Green': 1, 'Blue': 2, 'Yellow': 3, 'Orange': 3, 'Red': 4
+})
+_DEFAULT_COLOR_LEVEL = 3
+
+# Word heuristics, matched case-insensitively as substrings (e.g. "creates" counts as "create")
+_ACTION_WORDS_RE = re.compile(
+    "create|make|build|draw|write|discuss|identify|compare|sort|list", re.IGNORECASE
+)
+_COMPLEX_INDICATORS_RE = re.compile(
+    "synthesis|paradigm|methodology|theoretical|conceptualization", re.IGNORECASE
+)
+_ELEMENTARY_COMPLEX_WORDS_RE = re.compile(
+    "synthesize|paradigm|methodology|theoretical|conceptualization|"
+    "epistemological|phenomenological|dialectical|ontological",
+    re.IGNORECASE
+)
+
+# Words suggesting content exercises a skill, matched the same way as above
+_SKILL_INDICATORS_RE: Mapping[str, "re.Pattern[str]"] = MappingProxyType({
+    skill_name: re.compile("|".join(map(re.escape, indicators)), re.IGNORECASE)
+    for skill_name, indicators in {
+        'Categorise': ('group', 'sort', 'classify', 'organize', 'category'),
+        'Compare': ('similar', 'different', 'alike', 'contrast', 'comparison'),
+        'Sequence': ('order', 'first', 'next', 'then', 'sequence', 'step'),
+        'Explain': ('because', 'reason', 'why', 'explain', 'describe'),
+        'Hypothesise': ('predict', 'think', 'hypothesis', 'if', 'might'),
+        'Judge': ('best', 'better', 'choose', 'decide', 'evaluate'),
+        'Identify': ('find', 'point', 'name', 'identify', 'recognize'),
+        'Connect': ('link', 'connect', 'relate', 'relationship', 'connection')
+    }.items()
+})
+
+# Media URLs must be absolute http(s) links
+_URL_RE = re.compile(r'https?://')
+
+# Optional list fields whose items are trimmed, dropping blanks
+_CLEANED_LIST_FIELDS = ('sentence_starters', 'materials', 'target_words', 'criteria')
+
+# Grade strings such as "Year 4" or "Grade 10"
+_GRADE_RE = re.compile(r'(?:Year|Grade)\s+(\d+)', re.IGNORECASE)
+
+# Words as counted after splitting content into sentences on '.' (runs of non-space, non-period chars)
+_WORD_RE = re.compile(r'[^\s.]+')
+
+# Maximum average sentence length (in words) per elementary grade
+_MAX_SENTENCE_LENGTH: Mapping[int, int] = MappingProxyType({
+    1: 8, 2: 10, 3: 12, 4: 15, 5: 18, 6: 20
+})
+_DEFAULT_MAX_SENTENCE_LENGTH = 25
+
+_CURRICULUM_KEYWORDS: Mapping[str, FrozenSet[str]] = MappingProxyType({
+    'UK KS2': frozenset({'key stage', 'national curriculum', 'attainment', 'working scientifically'}),
+    'NGSS': frozenset({'performance expectation', 'disciplinary core', 'crosscutting concepts'}),
+    'IB PYP': frozenset({'inquiry', 'conceptual understanding', 'international mindedness'})
+})
+
 
 class LessonBlockValidator:
     """Validates lesson blocks against JSON schema and business rules"""
@@ -17,6 +124,7 @@ class LessonBlockValidator:
         
         self.schema_path = Path(schema_path)
         self._schema = None
+        self._validator = None
         self._load_schema()
     
     def _load_schema(self):
@@ -24,6 +132,11 @@ class LessonBlockValidator:
         try:
             with open(self.schema_path, 'r') as f:
                 self._schema = json.load(f)
+            
+            # Check the schema and build its validator once (draft picked from "$schema")
+            validator_class = jsonschema.validators.validator_for(self._schema)
+            validator_class.check_schema(self._schema)
+            self._validator = validator_class(self._schema)
             logger.info("Lesson block schema loaded successfully")
         except Exception as e:
             logger.error("Failed to load lesson block schema", error=str(e))
@@ -43,8 +156,10 @@ class LessonBlockValidator:
             ValidationError: If validation fails
         """
         try:
-            # JSON Schema validation
-            jsonschema.validate(instance=block_data, schema=self._schema)
+            # JSON Schema validation (raise the most relevant error, as jsonschema.validate does)
+            schema_error = jsonschema.exceptions.best_match(self._validator.iter_errors(block_data))
+            if schema_error is not None:
+                raise schema_error
             
             # Business logic validation
             self._validate_business_rules(block_data)
@@ -75,7 +190,7 @@ class LessonBlockValidator:
         if expected_block_types and block_type not in expected_block_types:
             raise ValidationError(
                 f"Skill '{skill_name}' is not typically used with {block_type} blocks. "
-                f"Expected: {', '.join(expected_block_types)}"
+                f"Expected: {', '.join(sorted(expected_block_types))}"
             )
         
         # Rule 2: Block-specific field requirements
@@ -93,8 +208,7 @@ class LessonBlockValidator:
             raise ValidationError("Block must have at least 2 steps")
         
         # Check for actionable language in steps
-        action_words = ['create', 'make', 'build', 'draw', 'write', 'discuss', 'identify', 'compare', 'sort', 'list']
-        actionable_steps = sum(1 for step in steps if any(word in step.lower() for word in action_words))
+        actionable_steps = sum(1 for step in steps if _ACTION_WORDS_RE.search(step))
         
         if actionable_steps < len(steps) * 0.5:  # At least 50% should be actionable
             logger.warning("Steps may not be sufficiently actionable", block_id=block_data.get('id'))
@@ -104,96 +218,38 @@ class LessonBlockValidator:
         description = block_data.get('description', '')
         
         # Check for overly complex words (basic heuristic)
-        complex_indicators = ['synthesis', 'paradigm', 'methodology', 'theoretical', 'conceptualization']
-        text_to_check = f"{title} {description}".lower()
-        
-        if any(indicator in text_to_check for indicator in complex_indicators):
+        if _COMPLEX_INDICATORS_RE.search(title) or _COMPLEX_INDICATORS_RE.search(description):
             logger.warning("Content may be too complex for target age group", block_id=block_data.get('id'))
     
-    def _get_expected_block_types_for_skill(self, skill_name: str) -> List[str]:
+    def _get_expected_block_types_for_skill(self, skill_name: str) -> FrozenSet[str]:
         """Get expected block types for a skill"""
-        
-        # Mapping based on Structural Learning framework
-        skill_to_blocks = {
-            # Green skills - typically MapIt
-            "Identify": ["MapIt"],
-            "Retrieve": ["MapIt", "SayIt"],
-            "Eliminate": ["MapIt"],
-            "Extract": ["MapIt"],
-            
-            # Blue skills - typically MapIt
-            "Categorise": ["MapIt"],
-            "Compare": ["MapIt"],
-            "Rank": ["MapIt"],
-            "Sequence": ["MapIt"],
-            "Connect": ["MapIt"],
-            
-            # Yellow skills - typically SayIt
-            "Explain": ["SayIt"],
-            "Validate": ["SayIt"],
-            "Exemplify": ["SayIt"],
-            "Verify": ["SayIt"],
-            "Amplify": ["SayIt"],
-            
-            # Orange skills - typically SayIt
-            "Verbs": ["SayIt"],
-            "Adverbs": ["SayIt"],
-            "Adjectives": ["SayIt"],
-            "Conjunctions": ["SayIt"],
-            "Prepositions": ["SayIt"],
-            "Target Vocabulary": ["SayIt"],
-            
-            # Red skills - typically BuildIt
-            "Hypothesise": ["BuildIt"],
-            "Judge": ["BuildIt"],
-            "Combine": ["BuildIt"],
-            "Imagine": ["BuildIt"],
-            "Designate": ["BuildIt"],
-            "Summarise": ["SayIt", "BuildIt"],  # Can be either
-            "Generate Questions": ["SayIt", "BuildIt"],
-            "Integrate": ["BuildIt"],
-            "Generalise": ["SayIt", "BuildIt"],
-            "Complete": ["BuildIt"],
-            "Elaborate": ["SayIt", "BuildIt"],
-            "New Perspective": ["SayIt", "BuildIt"],
-            "Infer": ["SayIt", "BuildIt"]
-        }
-        
-        return skill_to_blocks.get(skill_name, [])  # Return empty list if not found (allow any)
+        return _SKILL_TO_BLOCKS.get(skill_name, _ANY_BLOCK_TYPE)  # Empty if not found (allow any)
     
     def _clean_block_data(self, block_data: Dict[str, Any]) -> Dict[str, Any]:
         """Clean and normalize block data"""
         
-        cleaned = block_data.copy()
+        # Only the normalized fields are rebuilt; everything else is shared with block_data
+        cleaned = {}
         
         # Trim whitespace from strings
-        if 'title' in cleaned:
-            cleaned['title'] = cleaned['title'].strip()
-        
-        if 'description' in cleaned:
-            cleaned['description'] = cleaned['description'].strip()
-        
-        if 'supporting_question' in cleaned:
-            cleaned['supporting_question'] = cleaned['supporting_question'].strip()
+        for field in ('title', 'description', 'supporting_question'):
+            if field in block_data:
+                cleaned[field] = block_data[field].strip()
         
         # Clean steps
-        if 'steps' in cleaned:
-            cleaned['steps'] = [step.strip() for step in cleaned['steps'] if step.strip()]
+        if 'steps' in block_data:
+            cleaned['steps'] = [step for step in map(str.strip, block_data['steps']) if step]
         
         # Clean optional arrays
-        for field in ['sentence_starters', 'materials', 'target_words', 'criteria']:
-            if field in cleaned and cleaned[field]:
-                cleaned[field] = [item.strip() for item in cleaned[field] if item.strip()]
+        for field in _CLEANED_LIST_FIELDS:
+            if block_data.get(field):
+                cleaned[field] = [item for item in map(str.strip, block_data[field]) if item]
         
         # Ensure media URLs are valid
-        if 'media' in cleaned and cleaned['media']:
-            valid_media = []
-            for url in cleaned['media']:
-                if url.strip() and (url.startswith('http://') or url.startswith('https://')):
-                    valid_media.append(url.strip())
-            cleaned['media'] = valid_media
-        
-        return cleaned
+        if block_data.get('media'):
+            cleaned['media'] = [url.strip() for url in block_data['media'] if _URL_RE.match(url)]
+        
+        return {**block_data, **cleaned}
     
     def validate_lesson_plan(self, lesson_blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -205,13 +261,29 @@ class LessonBlockValidator:
         Returns:
             List of validated blocks
         """
-        if not lesson_blocks:
-            raise ValidationError("Lesson plan must contain at least one block")
+        validated_blocks = list(self.iter_validate_lesson_plan(lesson_blocks))
         
-        if len(lesson_blocks) > 6:
-            raise ValidationError("Lesson plan cannot contain more than 6 blocks")
+        # Validate lesson-level rules
+        self._validate_lesson_coherence(validated_blocks)
+        
+        logger.info("Lesson plan validation successful", block_count=len(validated_blocks))
+        return validated_blocks
+    
+    def iter_validate_lesson_plan(self, lesson_blocks: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Validate lesson blocks one at a time, yielding each as soon as it passes
+        
+        Lesson-level coherence is not checked here; consumers that need it call
+        validate_lesson_plan instead.
+        
+        Args:
+            lesson_blocks: List of lesson blocks to validate
+            
+        Yields:
+            Validated blocks, in order
+        """
+        self._check_block_count(lesson_blocks)
         
-        validated_blocks = []
         block_ids = set()
         
         for i, block in enumerate(lesson_blocks):
@@ -225,43 +297,42 @@ class LessonBlockValidator:
                     raise ValidationError(f"Duplicate block ID: {block_id}")
                 block_ids.add(block_id)
                 
-                validated_blocks.append(validated_block)
-                
             except ValidationError as e:
                 logger.error(f"Block {i+1} validation failed", error=str(e))
                 raise ValidationError(f"Block {i+1} validation failed: {str(e)}")
+            
+            yield validated_block
+    
+    @staticmethod
+    def _check_block_count(lesson_blocks: List[Dict[str, Any]]):
+        """Enforce the lesson plan size limits"""
+        if not lesson_blocks:
+            raise ValidationError("Lesson plan must contain at least one block")
         
-        # Validate lesson-level rules
-        self._validate_lesson_coherence(validated_blocks)
-        
-        logger.info("Lesson plan validation successful", block_count=len(validated_blocks))
-        return validated_blocks
+        if len(lesson_blocks) > 6:
+            raise ValidationError("Lesson plan cannot contain more than 6 blocks")
     
     def _validate_lesson_coherence(self, blocks: List[Dict[str, Any]]):
         """Validate coherence across the entire lesson"""
         
         # Check cognitive progression (loose validation)
         colors = [block['skill']['color'] for block in blocks]
-        color_order = {'Green': 1, 'Blue': 2, 'Yellow': 3, 'Orange': 3, 'Red': 4}
+        levels = [_COLOR_ORDER.get(color, _DEFAULT_COLOR_LEVEL) for color in colors]
         
         # Allow some flexibility but warn if progression seems backwards
-        for i in range(1, len(colors)):
-            current_level = color_order.get(colors[i], 3)
-            previous_level = color_order.get(colors[i-1], 3)
-            
-            if current_level < previous_level - 1:  # Allow one step backward
+        for i in range(1, len(levels)):
+            if levels[i] < levels[i-1] - 1:  # Allow one step backward
                 logger.warning(
                     "Potentially suboptimal cognitive progression",
-                    progression=[f"{colors[j]}({color_order.get(colors[j], 3)})" for j in range(len(colors))]
+                    progression=[f"{color}({level})" for color, level in zip(colors, levels)]
                 )
                 break
         
         # Check for variety in block types
         block_types = [block['type'] for block in blocks]
-        unique_types = set(block_types)
         
-        if len(unique_types) == 1 and len(blocks) > 2:
-            logger.warning("Lesson uses only one block type", block_type=list(unique_types)[0])
+        if len(block_types) > 2 and len(set(block_types)) == 1:
+            logger.warning("Lesson uses only one block type", block_type=block_types[0])
 
 
 class ContentQualityValidator:
@@ -272,39 +343,23 @@ class ContentQualityValidator:
         """Basic validation of age-appropriate content"""
         
         # Extract numeric grade level
-        grade_number = None
-        if 'Year' in grade:
-            try:
-                grade_number = int(grade.split()[-1])
-            except:
-                pass
-        elif 'Grade' in grade:
-            try:
-                grade_number = int(grade.split()[-1])
-            except:
-                pass
+        grade_match = _GRADE_RE.search(grade)
+        grade_number = int(grade_match.group(1)) if grade_match else None
         
         if not grade_number:
             return True  # Can't validate without grade info
         
-        content_lower = content.lower()
-        
         # Age-inappropriate complexity indicators
         if grade_number <= 6:  # Elementary
-            complex_words = [
-                'synthesize', 'paradigm', 'methodology', 'theoretical', 'conceptualization',
-                'epistemological', 'phenomenological', 'dialectical', 'ontological'
-            ]
-            if any(word in content_lower for word in complex_words):
+            if _ELEMENTARY_COMPLEX_WORDS_RE.search(content):
                 return False
         
         # Check sentence complexity (basic heuristic)
-        sentences = content.split('.')
-        avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
+        sentence_count = content.count('.') + 1
+        word_count = sum(1 for _ in _WORD_RE.finditer(content))
+        avg_sentence_length = word_count / sentence_count
         
-        max_sentence_length = {
-            1: 8, 2: 10, 3: 12, 4: 15, 5: 18, 6: 20
-        }.get(grade_number, 25)
+        max_sentence_length = _MAX_SENTENCE_LENGTH.get(grade_number, _DEFAULT_MAX_SENTENCE_LENGTH)
         
         if avg_sentence_length > max_sentence_length * 1.5:
             return False
@@ -320,13 +375,7 @@ class ContentQualityValidator:
         if not curriculum:
             return True
         
-        curriculum_keywords = {
-            'UK KS2': ['key stage', 'national curriculum', 'attainment', 'working scientifically'],
-            'NGSS': ['performance expectation', 'disciplinary core', 'crosscutting concepts'],
-            'IB PYP': ['inquiry', 'conceptual understanding', 'international mindedness']
-        }
-        
-        keywords = curriculum_keywords.get(curriculum, [])
+        keywords = _CURRICULUM_KEYWORDS.get(curriculum)
         if not keywords:
             return True  # Unknown curriculum, assume valid
         
@@ -338,23 +387,11 @@ class ContentQualityValidator:
     def validate_skill_alignment(content: str, skill_name: str) -> bool:
         """Validate that content actually develops the specified thinking skill"""
         
-        skill_indicators = {
-            'Categorise': ['group', 'sort', 'classify', 'organize', 'category'],
-            'Compare': ['similar', 'different', 'alike', 'contrast', 'comparison'],
-            'Sequence': ['order', 'first', 'next', 'then', 'sequence', 'step'],
-            'Explain': ['because', 'reason', 'why', 'explain', 'describe'],
-            'Hypothesise': ['predict', 'think', 'hypothesis', 'if', 'might'],
-            'Judge': ['best', 'better', 'choose', 'decide', 'evaluate'],
-            'Identify': ['find', 'point', 'name', 'identify', 'recognize'],
-            'Connect': ['link', 'connect', 'relate', 'relationship', 'connection']
-        }
-        
-        indicators = skill_indicators.get(skill_name, [])
-        if not indicators:
+        indicators_re = _SKILL_INDICATORS_RE.get(skill_name)
+        if indicators_re is None:
             return True  # Unknown skill, assume valid
         
-        content_lower = content.lower()
-        return any(indicator in content_lower for indicator in indicators)
+        return indicators_re.search(content) is not None
 
 
 # Global validator instances
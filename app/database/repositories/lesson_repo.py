@@ -1,11 +1,64 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from app.database.supabase_client import supabase_client
 from app.models.lesson import LessonPlan
 from app.utils.exceptions import DatabaseError
 from app.utils.logging import get_logger
+from app.utils.timestamps import utc_now
 
 logger = get_logger(__name__)
 
+# Short-lived cache of get_user_lessons results, keyed by (user_id, limit)
+USER_LESSONS_CACHE_MAX_ENTRIES = 1024
+USER_LESSONS_CACHE_TTL_SECONDS = 30
+
+_UserLessonsKey = Tuple[str, int]
+_user_lessons_cache: "OrderedDict[_UserLessonsKey, Tuple[float, Tuple[LessonPlan, ...]]]" = OrderedDict()
+
+
+def _get_cached_user_lessons(cache_key: _UserLessonsKey) -> Optional[List[LessonPlan]]:
+    """
+    Return cached lessons for a user listing, or None if missing/expired
+    
+    Cached entries are read-only snapshots; each caller gets its own deep copies,
+    so mutating a returned lesson never leaks into later reads.
+    """
+    entry = _user_lessons_cache.get(cache_key)
+    if entry is None:
+        return None
+    
+    stored_at, lessons = entry
+    if time.monotonic() - stored_at > USER_LESSONS_CACHE_TTL_SECONDS:
+        del _user_lessons_cache[cache_key]
+        return None
+    
+    _user_lessons_cache.move_to_end(cache_key)
+    return [lesson.model_copy(deep=True) for lesson in lessons]
+
+
+def _cache_user_lessons(cache_key: _UserLessonsKey, lessons: List[LessonPlan]):
+    """Store snapshots of lessons for a user listing, evicting the least recently used"""
+    # Snapshot so later changes to the caller's lessons do not reach the cache
+    _user_lessons_cache[cache_key] = (time.monotonic(), tuple(lesson.model_copy(deep=True) for lesson in lessons))
+    _user_lessons_cache.move_to_end(cache_key)
+    
+    while len(_user_lessons_cache) > USER_LESSONS_CACHE_MAX_ENTRIES:
+        _user_lessons_cache.popitem(last=False)
+
+
+def _invalidate_user_lessons(user_ids: Iterable[Optional[str]] = (), lesson_id: Optional[str] = None):
+    """Drop cached listings for the given users, and any listing containing lesson_id"""
+    user_ids = set(user_ids)
+    stale_keys = [
+        key for key, (_, lessons) in _user_lessons_cache.items()
+        if key[0] in user_ids or (lesson_id is not None and any(lesson.id == lesson_id for lesson in lessons))
+    ]
+    for key in stale_keys:
+        del _user_lessons_cache[key]
+
 
 class LessonRepository:
     """Repository for lesson CRUD operations"""
@@ -13,44 +66,69 @@ class LessonRepository:
     def __init__(self):
         self.client = supabase_client.client
     
+    @staticmethod
+    def _to_row(lesson: LessonPlan) -> Dict[str, Any]:
+        """Build the lessons table row for a lesson plan"""
+        return {
+            'id': lesson.id,
+            'user_id': lesson.user_id,
+            'title': lesson.title,
+            'topic': lesson.topic,
+            'grade': lesson.grade,
+            'subject': lesson.subject,
+            'curriculum': lesson.curriculum,
+            'difficulty': lesson.difficulty,
+            'blocks': lesson.blocks,
+            'metadata': lesson.metadata,
+            'created_at': lesson.created_at.isoformat(),
+            'updated_at': lesson.updated_at.isoformat()
+        }
+    
     async def create_lesson(self, lesson: LessonPlan) -> str:
         """Create a new lesson in the database"""
+        return (await self.create_lessons([lesson]))[0]
+    
+    async def create_lessons(self, lessons: List[LessonPlan]) -> List[str]:
+        """
+        Create several lessons with a single insert request
+        
+        Args:
+            lessons: Lesson plans to insert
+            
+        Returns:
+            IDs of the created lessons, in insert order
+        """
+        if not lessons:
+            return []
+        
+        lesson_ids = [lesson.id for lesson in lessons]
         try:
-            lesson_data = {
-                'id': lesson.id,
-                'user_id': lesson.user_id,
-                'title': lesson.title,
-                'topic': lesson.topic,
-                'grade': lesson.grade,
-                'subject': lesson.subject,
-                'curriculum': lesson.curriculum,
-                'difficulty': lesson.difficulty,
-                'blocks': lesson.blocks,
-                'metadata': lesson.metadata,
-                'created_at': lesson.created_at.isoformat(),
-                'updated_at': lesson.updated_at.isoformat()
-            }
+            rows = [self._to_row(lesson) for lesson in lessons]
             
-            result = self.client.table('lessons').insert(lesson_data).execute()
+            # The supabase client is synchronous; keep the request off the event loop
+            result = await asyncio.to_thread(self.client.table('lessons').insert(rows).execute)
             
-            if result.data:
-                logger.info("Lesson created successfully", lesson_id=lesson.id)
-                return lesson.id
+            if result.data and len(result.data) == len(rows):
+                _invalidate_user_lessons(lesson.user_id for lesson in lessons)
+                logger.info("Lessons created successfully", lesson_ids=lesson_ids)
+                return [row['id'] for row in result.data]
             else:
                 raise DatabaseError("Failed to create lesson")
                 
         except Exception as e:
-            logger.error("Error creating lesson", error=str(e), lesson_id=lesson.id)
+            logger.error("Error creating lesson", error=str(e), lesson_ids=lesson_ids)
             raise DatabaseError(f"Failed to create lesson: {str(e)}")
     
     async def get_lesson(self, lesson_id: str) -> Optional[LessonPlan]:
         """Retrieve a lesson by ID"""
         try:
-            result = self.client.table('lessons').select('*').eq('id', lesson_id).execute()
+            # maybe_single() asks PostgREST for a single object rather than a list
+            result = await asyncio.to_thread(
+                self.client.table('lessons').select('*').eq('id', lesson_id).maybe_single().execute
+            )
             
-            if result.data and len(result.data) > 0:
-                lesson_data = result.data[0]
-                return LessonPlan(**lesson_data)
+            if result is not None and result.data:
+                return self._to_lesson(result.data)
             else:
                 return None
                 
@@ -58,23 +136,53 @@ class LessonRepository:
             logger.error("Error retrieving lesson", error=str(e), lesson_id=lesson_id)
             raise DatabaseError(f"Failed to retrieve lesson: {str(e)}")
     
-    async def get_user_lessons(self, user_id: str, limit: int = 50) -> List[LessonPlan]:
-        """Retrieve lessons for a specific user"""
+    @staticmethod
+    def _to_lesson(lesson_data: Dict[str, Any]) -> LessonPlan:
+        """
+        Build a LessonPlan from a lessons row without revalidating it
+        
+        Rows were validated on insert, so only the timestamps (returned as ISO
+        strings) need converting; model_construct would keep them as strings.
+        """
+        for field in ('created_at', 'updated_at'):
+            value = lesson_data.get(field)
+            if isinstance(value, str):
+                lesson_data[field] = datetime.fromisoformat(value)
+        return LessonPlan.model_construct(**lesson_data)
+    
+    async def get_user_lessons(
+        self,
+        user_id: str,
+        limit: int = 50
+    ) -> List[LessonPlan]:
+        """
+        Retrieve lessons for a specific user
+        
+        Args:
+            user_id: Owner of the lessons
+            limit: Maximum number of lessons to return
+            
+        Returns:
+            List of lessons, newest first (the caller's own copies, safe to mutate)
+        """
+        cache_key = (user_id, limit)
+        cached_lessons = _get_cached_user_lessons(cache_key)
+        if cached_lessons is not None:
+            return cached_lessons
+        
         try:
-            result = (
+            query = (
                 self.client.table('lessons')
                 .select('*')
                 .eq('user_id', user_id)
                 .order('created_at', desc=True)
                 .limit(limit)
-                .execute()
             )
+            result = await asyncio.to_thread(query.execute)
             
-            lessons = []
-            if result.data:
-                for lesson_data in result.data:
-                    lessons.append(LessonPlan(**lesson_data))
+            lessons = [self._to_lesson(lesson_data) for lesson_data in result.data or ()]
             
+            _cache_user_lessons(cache_key, lessons)
             logger.info("Retrieved user lessons", user_id=user_id, count=len(lessons))
             return lessons
             
@@ -85,17 +193,21 @@ class LessonRepository:
     async def update_lesson(self, lesson_id: str, updates: Dict[str, Any]) -> bool:
         """Update a lesson"""
         try:
-            # Add updated timestamp
-            updates['updated_at'] = lesson.updated_at.isoformat() if 'updated_at' in updates else None
+            # Stamp the update unless the caller supplied a timestamp (without mutating their dict)
+            updated_at = updates.get('updated_at') or utc_now()
+            if isinstance(updated_at, datetime):
+                updated_at = updated_at.isoformat()  # The client cannot JSON-serialise datetimes
+            updates = {**updates, 'updated_at': updated_at}
             
-            result = (
+            query = (
                 self.client.table('lessons')
                 .update(updates)
                 .eq('id', lesson_id)
-                .execute()
             )
+            result = await asyncio.to_thread(query.execute)
             
             if result.data:
+                _invalidate_user_lessons((row.get('user_id') for row in result.data), lesson_id=lesson_id)
                 logger.info("Lesson updated successfully", lesson_id=lesson_id)
                 return True
             else:
@@ -108,15 +220,16 @@ class LessonRepository:
     async def delete_lesson(self, lesson_id: str, user_id: str) -> bool:
         """Delete a lesson (with user ownership check)"""
         try:
-            result = (
+            query = (
                 self.client.table('lessons')
                 .delete()
                 .eq('id', lesson_id)
                 .eq('user_id', user_id)  # Ensure user owns the lesson
-                .execute()
             )
+            result = await asyncio.to_thread(query.execute)
             
             if result.data:
+                _invalidate_user_lessons((user_id,))
                 logger.info("Lesson deleted successfully", lesson_id=lesson_id)
                 return True
             else:
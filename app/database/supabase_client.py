@@ -1,49 +1,66 @@
+import asyncio
 from supabase import create_client, Client
 from app.config import settings
 from app.utils.logging import get_logger
-from typing import Optional
 
 logger = get_logger(__name__)
 
+# Keep-alive connections opened on startup so early requests skip the TCP/TLS handshake
+WARM_CONNECTIONS = 2
+
 
 class SupabaseClient:
     """Supabase client wrapper"""
     
     def __init__(self):
-        self._client: Optional[Client] = None
-        self._service_client: Optional[Client] = None
+        # Both clients are created up front so the accessors are plain reads and
+        # concurrent first requests cannot race to create duplicate clients
+        self._client: Client = create_client(
+            settings.supabase_url,
+            settings.supabase_key
+        )
+        self._service_client: Client = create_client(
+            settings.supabase_url,
+            settings.supabase_service_role_key
+        )
+        logger.info("Supabase clients initialized")
     
     @property
     def client(self) -> Client:
         """Get the regular Supabase client"""
-        if self._client is None:
-            self._client = create_client(
-                settings.supabase_url,
-                settings.supabase_key
-            )
-            logger.info("Supabase client initialized")
         return self._client
     
     @property
     def service_client(self) -> Client:
         """Get the service role Supabase client (for admin operations)"""
-        if self._service_client is None:
-            self._service_client = create_client(
-                settings.supabase_url,
-                settings.supabase_service_role_key
-            )
-            logger.info("Supabase service client initialized")
         return self._service_client
     
+    def _probe(self):
+        """Simple query to test connection; no rows are needed to prove it works"""
+        self.client.table('profiles').select('id').limit(0).execute()
+    
     async def health_check(self) -> bool:
         """Check if Supabase is healthy"""
         try:
-            # Simple query to test connection
-            result = self.client.table('profiles').select('id').limit(1).execute()
+            # The client is synchronous; keep the round-trip off the event loop
+            await asyncio.to_thread(self._probe)
             return True
         except Exception as e:
             logger.error("Supabase health check failed", error=str(e))
             return False
+    
+    async def warm_up(self, connections: int = WARM_CONNECTIONS) -> bool:
+        """
+        Open pooled keep-alive connections by running concurrent health probes
+        
+        Args:
+            connections: Number of concurrent probes (connections to open)
+            
+        Returns:
+            True if every probe succeeded
+        """
+        results = await asyncio.gather(*(self.health_check() for _ in range(connections)))
+        return all(results)
 
 
 # Global instance
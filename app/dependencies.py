@@ -1,44 +1,61 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import FrozenSet, Iterable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from app.services.lesson_service import LessonService, lesson_service
+from app.services.storage_service import StorageService, storage_service
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-# Security scheme for future JWT implementation
-security = HTTPBearer(auto_error=False)
+# MVP: every request runs as this user until JWT validation exists
+MVP_USER_ID = "mvp-user-123"
 
 
-async def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
-) -> Optional[str]:
+class AuthASGIMiddleware:
     """
-    Get the current authenticated user
+    Resolve the current user once per HTTP request, in plain ASGI
     
-    For MVP: Returns a default user ID
-    For Production: Would validate JWT token and return user ID
+    For MVP: Every request gets the default user ID
+    For Production: Would validate the Bearer JWT here and reject invalid tokens
+    
+    The user ID is stored in the request state, where get_current_user reads it.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # In production, this would:
+        # 1. Validate the JWT token from the Bearer credentials
+        # 2. Extract user ID from the token
+        # 3. Send a 401 response for invalid tokens
+        authorization = next((value for name, value in scope["headers"] if name == b"authorization"), None)
+        if authorization is None or authorization[:7].lower() != b"bearer ":
+            # For MVP, allow unauthenticated access with default user
+            logger.debug("No credentials provided, using default MVP user")
+        else:
+            # Future JWT validation would go here
+            logger.debug("Credentials present but JWT validation not implemented")
+        
+        # Fresh state dict per request, so lifespan state is never written to
+        scope["state"] = {**scope.get("state", {}), "user_id": MVP_USER_ID}
+        await self.app(scope, receive, send)
+
+
+async def get_current_user(request: Request) -> Optional[str]:
+    """
+    Get the current authenticated user, as resolved by AuthASGIMiddleware
     
     Args:
-        credentials: HTTP Authorization credentials (Bearer token)
+        request: Incoming request
         
     Returns:
         User ID string or None if not authenticated
     """
-    # MVP Implementation - return default user
-    # In production, this would:
-    # 1. Validate the JWT token from credentials.credentials
-    # 2. Extract user ID from the token
-    # 3. Return user ID or raise HTTPException for invalid tokens
-    
-    if not credentials:
-        # For MVP, allow unauthenticated access with default user
-        logger.debug("No credentials provided, using default MVP user")
-        return "mvp-user-123"
-    
-    # Future JWT validation would go here
-    # For now, just log the token presence
-    logger.debug("Credentials present but JWT validation not implemented")
-    return "mvp-user-123"
+    return request.scope.get("state", {}).get("user_id")
 
 
 async def get_authenticated_user(
@@ -70,13 +87,13 @@ async def get_authenticated_user(
 class PermissionChecker:
     """Future class for handling different permission levels"""
     
-    def __init__(self, required_permissions: list = None):
-        self.required_permissions = required_permissions or []
+    def __init__(self, required_permissions: Iterable[str] = None):
+        self.required_permissions: FrozenSet[str] = frozenset(required_permissions or ())
     
     async def __call__(self, current_user: str = Depends(get_authenticated_user)) -> str:
         """Check if user has required permissions"""
         # For MVP, all authenticated users have all permissions
-        # In production, this would check user roles/permissions
+        # In production, this would check self.required_permissions.issubset(user_permissions)
         return current_user
 
 
@@ -86,13 +103,11 @@ require_admin_permissions = PermissionChecker(["admin_access"])
 
 
 # Database dependency helpers
-async def get_lesson_service():
+async def get_lesson_service() -> LessonService:
     """Get lesson service instance"""
-    from app.services.lesson_service import lesson_service
     return lesson_service
 
 
-async def get_storage_service():
+async def get_storage_service() -> StorageService:
     """Get storage service instance"""
-    from app.services.storage_service import storage_service
-    return storage_service
\ No newline at end of file
+    return storage_service
@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
+import orjson
 import uvicorn
+from typing import Optional
 
 from app.config import settings
+from app.dependencies import AuthASGIMiddleware
 from app.utils.logging import configure_logging, get_logger
 from app.utils.exceptions import (
     StructuralLearningException,
@@ -37,8 +40,10 @@ async def lifespan(app: FastAPI):
         from app.database.supabase_client import supabase_client
         from app.core.generation.llm_client import llm_service
         
-        # Test database connection
-        db_healthy = await supabase_client.health_check()
+        # Share the client through app state and test the database connection,
+        # warming the HTTP connection pool in the same step
+        app.state.supabase_client = supabase_client
+        db_healthy = await supabase_client.warm_up()
         logger.info("Database health check", healthy=db_healthy)
         
         # Test LLM service
@@ -52,6 +57,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Structural Learning AI API")
+    
+    # Let background lesson saves finish so generated lessons are not lost
+    from app.services.storage_service import storage_service
+    await storage_service.drain_pending_saves()
 
 
 # Create FastAPI application
@@ -70,9 +79,28 @@ if data_dir.exists():
     logger.info(f"Mounted static file server at /resources -> {data_dir}")
 else:
     logger.warning(f"Data directory not found at {data_dir}, static resources will not be available")
+# Resolve the current user for every request (added before CORS so CORS stays outermost)
+app.add_middleware(AuthASGIMiddleware)
+
+class FastPathCORSMiddleware(CORSMiddleware):
+    """
+    CORSMiddleware that hands requests without an Origin header straight to the app
+    
+    Same-origin and server-to-server calls need no CORS handling, so they skip the
+    per-request header parsing; preflight headers are already prebuilt by CORSMiddleware.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not any(name == b"origin" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        
+        await super().__call__(scope, receive, send)
+
+
 # Add CORS middleware
 app.add_middleware(
-    CORSMiddleware,
+    FastPathCORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
@@ -80,67 +108,46 @@ app.add_middleware(
 )
 
 
-# Exception handlers
-@app.exception_handler(ValidationError)
-async def validation_exception_handler(request, exc):
-    logger.warning("Validation error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=400,
-        content={"error": "Validation Error", "message": str(exc)}
-    )
-
-
-@app.exception_handler(SkillSelectionError)
-async def skill_selection_exception_handler(request, exc):
-    logger.error("Skill selection error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=400,
-        content={"error": "Skill Selection Error", "message": str(exc)}
-    )
-
-
-@app.exception_handler(LLMGenerationError)
-async def llm_generation_exception_handler(request, exc):
-    logger.error("LLM generation error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=503,
-        content={"error": "Content Generation Error", "message": "Failed to generate lesson content. Please try again."}
-    )
-
-
-@app.exception_handler(RAGRetrievalError)
-async def rag_retrieval_exception_handler(request, exc):
-    logger.error("RAG retrieval error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=503,
-        content={"error": "Context Retrieval Error", "message": "Failed to retrieve curriculum context."}
-    )
-
-
-@app.exception_handler(DatabaseError)
-async def database_exception_handler(request, exc):
-    logger.error("Database error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Database Error", "message": "A database error occurred."}
-    )
+# Exception handlers: (exception, status code, error label, client message, log event, log level)
+# A None message echoes str(exc); fixed messages are serialized once at registration
+_EXCEPTION_HANDLERS = (
+    (ValidationError, 400, "Validation Error", None, "Validation error", "warning"),
+    (SkillSelectionError, 400, "Skill Selection Error", None, "Skill selection error", "error"),
+    (LLMGenerationError, 503, "Content Generation Error",
+     "Failed to generate lesson content. Please try again.", "LLM generation error", "error"),
+    (RAGRetrievalError, 503, "Context Retrieval Error",
+     "Failed to retrieve curriculum context.", "RAG retrieval error", "error"),
+    (DatabaseError, 500, "Database Error", "A database error occurred.", "Database error", "error"),
+    (EmbeddingError, 503, "Embedding Error", "Failed to process text embeddings.", "Embedding error", "error"),
+    (StructuralLearningException, 500, "Application Error",
+     "An error occurred in the lesson planning system.", "Structural Learning error", "error"),
+)
 
 
-@app.exception_handler(EmbeddingError)
-async def embedding_exception_handler(request, exc):
-    logger.error("Embedding error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=503,
-        content={"error": "Embedding Error", "message": "Failed to process text embeddings."}
-    )
+def _make_exception_handler(
+    status_code: int,
+    error_label: str,
+    message: Optional[str],
+    log_event: str,
+    log_level: str
+):
+    """Build a handler that logs the error and returns its JSON error body"""
+    log = getattr(logger, log_level)
+    static_body = None if message is None else orjson.dumps({"error": error_label, "message": message})
+    
+    async def handler(request, exc):
+        # The ASGI scope already holds the path; request.url would build a full URL object
+        log(log_event, error=str(exc), path=request.scope.get("root_path", "") + request.scope["path"])
+        body = static_body or orjson.dumps({"error": error_label, "message": str(exc)})
+        return Response(content=body, status_code=status_code, media_type="application/json")
+    
+    return handler
 
 
-@app.exception_handler(StructuralLearningException)
-async def structural_learning_exception_handler(request, exc):
-    logger.error("Structural Learning error", error=str(exc), path=request.url.path)
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Application Error", "message": "An error occurred in the lesson planning system."}
+for exc_class, status_code, error_label, message, log_event, log_level in _EXCEPTION_HANDLERS:
+    app.add_exception_handler(
+        exc_class,
+        _make_exception_handler(status_code, error_label, message, log_event, log_level)
     )
 
 
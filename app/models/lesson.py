@@ -1,11 +1,14 @@
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from uuid import UUID, uuid4
+from app.utils.ids import uuid4_str
+from app.utils.timestamps import utc_now
 
 
-class SkillSpec(BaseModel):
-    """Specification for a thinking skill"""
+@dataclass(frozen=True, slots=True)
+class SkillSpec:
+    """Specification for a thinking skill (internal, built from trusted metadata and shared read-only)"""
     name: str
     color: str
     block_type: str
@@ -15,8 +18,9 @@ class SkillSpec(BaseModel):
     media_suggestion: Optional[str] = None
 
 
-class BlockSpec(BaseModel):
-    """Specification for generating a lesson block"""
+@dataclass(frozen=True, slots=True)
+class BlockSpec:
+    """Specification for generating a lesson block (internal, never validated from request data)"""
     skill: SkillSpec
     sequence_order: int
     context: Dict[str, Any]
@@ -24,7 +28,7 @@ class BlockSpec(BaseModel):
 
 class LessonPlan(BaseModel):
     """Internal lesson plan model"""
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    id: str = Field(default_factory=uuid4_str)
     user_id: Optional[str] = None
     title: str
     topic: str
@@ -34,8 +38,8 @@ class LessonPlan(BaseModel):
     difficulty: float
     blocks: List[Dict[str, Any]]  # Will contain LessonBlock data
     metadata: Dict[str, Any]
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
 
 
 class GenerationContext(BaseModel):
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from enum import Enum
 
 
@@ -42,24 +42,26 @@ class LessonRequest(BaseModel):
         default=True,
         description="Whether to prioritize variety over time efficiency"
     )
-    time_flexibility: str = Field(
+    time_flexibility: Literal['strict', 'moderate', 'flexible'] = Field(
         default="moderate",
         description="How flexible the timing is: 'strict', 'moderate', or 'flexible'"
     )
+    sync_save: bool = Field(
+        default=False,
+        description=(
+            "Wait for the lesson to be saved before responding. By default it is saved in the "
+            "background, so fetching the returned lesson_id straight away may briefly return 404; "
+            "set this if the client reads the lesson back immediately"
+        )
+    )
     
-    @validator('time_flexibility')
-    def validate_time_flexibility(cls, v):
-        if v not in ['strict', 'moderate', 'flexible']:
-            raise ValueError('time_flexibility must be "strict", "moderate", or "flexible"')
-        return v
-    
-    @validator('available_time_minutes')
-    def validate_time_vs_steps(cls, v, values):
-        if v is not None and 'step_count' in values:
-            min_time_needed = values['step_count'] * 5  # Minimum 5 minutes per step
-            if v < min_time_needed:
-                raise ValueError(f'Available time ({v} min) is too short for {values["step_count"]} steps. Minimum needed: {min_time_needed} min')
-        return v
+    @model_validator(mode='after')
+    def validate_time_vs_steps(self):
+        if self.available_time_minutes is not None:
+            min_time_needed = self.step_count * 5  # Minimum 5 minutes per step
+            if self.available_time_minutes < min_time_needed:
+                raise ValueError(f'Available time ({self.available_time_minutes} min) is too short for {self.step_count} steps. Minimum needed: {min_time_needed} min')
+        return self
 
 
 class SequenceRequest(BaseModel):
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from app.utils.timestamps import utc_now
 
 
 class SkillColor(str, Enum):
@@ -20,6 +21,9 @@ class BlockType(str, Enum):
 
 
 class SkillMetadata(BaseModel):
+    # Built once per block and never modified afterwards
+    model_config = ConfigDict(frozen=True)
+    
     name: str
     color: SkillColor
     icon_url: str
@@ -28,6 +32,8 @@ class SkillMetadata(BaseModel):
 
 class ResourceLink(BaseModel):
     """Link to a supporting resource"""
+    model_config = ConfigDict(frozen=True)
+    
     type: str  # "pdf", "video", "image"
     name: str
     description: Optional[str] = None
@@ -59,7 +65,7 @@ class LessonBlock(BaseModel):
 
 class HealthResponse(BaseModel):
     status: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
     version: str = "1.0.0"
 
 
@@ -80,4 +86,4 @@ class LessonResponse(BaseModel):
     difficulty: float
     blocks: List[LessonBlock]
     metadata: LessonMetadata
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    generated_at: datetime = Field(default_factory=utc_now)
\ No newline at end of file
@@ -1,4 +1,7 @@
-from typing import List, Optional
+import asyncio
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional
 import uuid
 from datetime import datetime
 from app.models.requests import LessonRequest
@@ -6,7 +9,9 @@ from app.models.responses import LessonResponse, LessonMetadata
 from app.models.lesson import LessonPlan, GenerationContext, SkillSpec
 
 # Import enhanced components
+from app.core.skills.enhanced_metadata import enhanced_skill_metadata
 from app.core.skills.enhanced_selector import enhanced_skill_selector
+from app.core.skills.icons import icon_url_for
 from app.core.generation.enhanced_prompt_builder import enhanced_prompt_builder
 from app.core.generation.block_generator import block_generator
 from app.core.rag.context_builder import rag_context_builder
@@ -17,6 +22,40 @@ from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Update block generator to use enhanced prompt builder (once, at import)
+block_generator.prompt_builder = enhanced_prompt_builder
+
+# Upper bound on block generations (LLM calls) in flight across all requests
+MAX_CONCURRENT_BLOCK_GENERATIONS = 4
+
+# Estimated minutes per block type
+_BLOCK_DURATION_MINUTES = MappingProxyType({
+    "MapIt": 15,    # Visual activities need more time
+    "SayIt": 12,    # Discussion activities
+    "BuildIt": 20   # Construction activities need most time
+})
+_DEFAULT_BLOCK_DURATION_MINUTES = 12
+
+# Scaffold types drawn when filling a lesson, with (options, weights) per difficulty band
+_SCAFFOLD_TYPES = ("MapIt", "SayIt", "BuildIt")
+_SCAFFOLD_WEIGHTS_LOW = (_SCAFFOLD_TYPES, (0.5, 0.4, 0.1))
+_SCAFFOLD_WEIGHTS_MID = (_SCAFFOLD_TYPES, (0.4, 0.4, 0.2))
+_SCAFFOLD_WEIGHTS_HIGH = (_SCAFFOLD_TYPES, (0.3, 0.3, 0.4))
+
+# Scaffold types to pick from after two consecutive blocks of the same type
+_SCAFFOLD_ALTERNATIVES = MappingProxyType({
+    scaffold: tuple(t for t in _SCAFFOLD_TYPES if t != scaffold) for scaffold in _SCAFFOLD_TYPES
+})
+
+# Enhanced difficulty labels with framework context; a difficulty on a bound takes the lower label
+_DIFFICULTY_LABEL_BOUNDS = (0.25, 0.5, 0.75)
+_DIFFICULTY_LABELS = (
+    "Foundational - Building basic understanding",
+    "Developing - Applying skills with support",
+    "Proficient - Independent skill application",
+    "Advanced - Complex synthesis and evaluation"
+)
+
 
 class EnhancedLessonService:
     """Enhanced lesson service using framework-aware components"""
@@ -27,9 +66,7 @@ class EnhancedLessonService:
         self.block_generator = block_generator
         self.rag_builder = rag_context_builder
         self.storage_service = storage_service
-        
-        # Update block generator to use enhanced prompt builder
-        self.block_generator.prompt_builder = enhanced_prompt_builder
+        self._generation_semaphore = asyncio.Semaphore(MAX_CONCURRENT_BLOCK_GENERATIONS)
     
     def verify_skill_metadata(self, skill: SkillSpec) -> SkillSpec:
         """
@@ -42,53 +79,42 @@ class EnhancedLessonService:
             SkillSpec with corrected color and block_type if needed
         """
         try:
-            # Import the enhanced metadata
-            from app.core.skills.enhanced_metadata import enhanced_skill_metadata
-            
             # Look up the correct color and block_type for this skill
-            correct_color = None
-            correct_block_type = None
+            placement = enhanced_skill_metadata.get_skill_placement(skill.name)
+            if placement is None:
+                return skill
+            correct_color, correct_block_type = placement
             
-            # Check each color category
-            for color, color_data in enhanced_skill_metadata._skills_data.items():
-                # Look for the skill in this color
-                for skill_data in color_data.get("skills", []):
-                    if skill_data["skill"] == skill.name:
-                        correct_color = color
-                        correct_block_type = skill_data["block_type"]
-                        break
-                
-                if correct_color:
-                    break
+            # If the metadata matches, return the original
+            if skill.color == correct_color and skill.block_type == correct_block_type:
+                return skill
             
-            # If we found correct metadata, check if it matches
-            if correct_color and correct_block_type:
-                if skill.color != correct_color or skill.block_type != correct_block_type:
-                    logger.warning(
-                        f"Correcting skill metadata: {skill.name} should be {correct_color}/{correct_block_type}, "
-                        f"not {skill.color}/{skill.block_type}"
-                    )
-                    
-                    # Generate the correct icon URL
-                    icon_url = self._ensure_correct_icon_url(skill.name, correct_color)
-                    
-                    # Return a corrected SkillSpec
-                    return SkillSpec(
-                        name=skill.name,
-                        color=correct_color,
-                        block_type=correct_block_type,
-                        example_question=skill.example_question,
-                        description=skill.description,
-                        icon_url=icon_url,
-                        media_suggestion=skill.media_suggestion
-                    )
+            logger.warning(
+                f"Correcting skill metadata: {skill.name} should be {correct_color}/{correct_block_type}, "
+                f"not {skill.color}/{skill.block_type}"
+            )
             
-            # If no correction needed or metadata not found, return the original
-            return skill
+            # Generate the correct icon URL
+            icon_url = self._ensure_correct_icon_url(skill.name, correct_color)
+            
+            # Return a corrected SkillSpec
+            return SkillSpec(
+                name=skill.name,
+                color=correct_color,
+                block_type=correct_block_type,
+                example_question=skill.example_question,
+                description=skill.description,
+                icon_url=icon_url,
+                media_suggestion=skill.media_suggestion
+            )
             
         except Exception as e:
             logger.error(f"Error verifying skill metadata for {skill.name}", error=str(e))
             return skill
+    
+    def _ensure_correct_icon_url(self, skill_name: str, color: str) -> str:
+        """Ensure the icon URL is correctly formatted for the skill and color"""
+        return icon_url_for(skill_name, color)
         
     def _generate_varied_scaffold_sequence(self, step_count: int, difficulty: float) -> List[str]:
         """Generate a varied sequence of scaffold types"""
@@ -109,25 +135,21 @@ class EnhancedLessonService:
             # For easier lessons, alternate between MapIt and SayIt
             scaffolds.append("MapIt" if scaffolds[-1] == "SayIt" else "SayIt")
         
-        # Fill remaining steps with variety (avoid repetition)
-        while len(scaffolds) < step_count:
-            # Avoid three consecutive instances of the same type
+        # Weighted selection - BuildIt less common for easier lessons
+        if difficulty < 0.4:
+            options, weights = _SCAFFOLD_WEIGHTS_LOW
+        elif difficulty < 0.7:
+            options, weights = _SCAFFOLD_WEIGHTS_MID
+        else:
+            options, weights = _SCAFFOLD_WEIGHTS_HIGH
+        
+        # Fill remaining steps with variety (avoid repetition), drawing all weighted picks at once
+        for weighted_pick in random.choices(options, weights=weights, k=step_count - len(scaffolds)):
+            # Avoid three consecutive instances of the same type (the weighted pick goes unused)
             if len(scaffolds) >= 2 and scaffolds[-1] == scaffolds[-2]:
-                options = [t for t in ["MapIt", "SayIt", "BuildIt"] if t != scaffolds[-1]]
-                scaffolds.append(random.choice(options))
+                scaffolds.append(random.choice(_SCAFFOLD_ALTERNATIVES[scaffolds[-1]]))
             else:
-                # Weighted selection - BuildIt less common for easier lessons
-                if difficulty < 0.4:
-                    weights = {"MapIt": 0.5, "SayIt": 0.4, "BuildIt": 0.1}
-                elif difficulty < 0.7:
-                    weights = {"MapIt": 0.4, "SayIt": 0.4, "BuildIt": 0.2}
-                else:
-                    weights = {"MapIt": 0.3, "SayIt": 0.3, "BuildIt": 0.4}
-                
-                options = list(weights.keys())
-                weights_list = [weights[opt] for opt in options]
-                
-                scaffolds.append(random.choices(options, weights=weights_list)[0])
+                scaffolds.append(weighted_pick)
         
         return scaffolds
     
@@ -178,44 +200,7 @@ class EnhancedLessonService:
             )
             
             # Verify and correct skill metadata if needed
-            verified_skills = []
-            for skill in selected_skills:
-                # Add verification function to the skill selector if not already there
-                if hasattr(self.skill_selector, 'verify_skill_metadata'):
-                    verified_skill = self.skill_selector.verify_skill_metadata(skill)
-                else:
-                    # Import the verification function
-                    from app.core.skills.enhanced_metadata import enhanced_skill_metadata
-                    
-                    # Look up correct metadata
-                    verified_skill = skill
-                    for color, color_data in enhanced_skill_metadata._skills_data.items():
-                        for skill_data in color_data.get("skills", []):
-                            if skill_data["skill"] == skill.name:
-                                # If metadata doesn't match, create corrected skill
-                                if skill.color != color or skill.block_type != skill_data["block_type"]:
-                                    logger.warning(
-                                        f"Correcting skill metadata: {skill.name} should be {color}/{skill_data['block_type']}, "
-                                        f"not {skill.color}/{skill.block_type}"
-                                    )
-                                    
-                                    # Generate correct icon URL
-                                    icon_url = f"https://cdn.structural-learning.com/icons/{color.lower()}_{skill.name.lower().replace(' ', '_')}.svg"
-                                    
-                                    verified_skill = SkillSpec(
-                                        name=skill.name,
-                                        color=color,
-                                        block_type=skill_data["block_type"],
-                                        example_question=skill.example_question,
-                                        description=skill.description,
-                                        icon_url=icon_url,
-                                        media_suggestion=skill.media_suggestion
-                                    )
-                                break
-                        if verified_skill != skill:
-                            break
-                
-                verified_skills.append(verified_skill)
+            verified_skills = [self.verify_skill_metadata(skill) for skill in selected_skills]
             
             # Log the verified skills
             logger.info(
@@ -254,9 +239,10 @@ class EnhancedLessonService:
                 await self._save_lesson_plan(
                     lesson_id=lesson_id,
                     request=request,
-                    blocks=lesson_blocks,
+                    blocks_data=[block.model_dump(mode="json") for block in lesson_blocks],
                     metadata=lesson_metadata,
-                    user_id=user_id
+                    user_id=user_id,
+                    wait=request.sync_save
                 )
             
             # Create response
@@ -290,29 +276,62 @@ class EnhancedLessonService:
         skills: List,
         context: GenerationContext
     ) -> List:
-        """Generate blocks using enhanced framework-aware components"""
+        """Generate blocks using enhanced framework-aware components
         
-        blocks = []
+        Blocks do not depend on each other, so they are generated concurrently
+        (bounded by MAX_CONCURRENT_BLOCK_GENERATIONS) and returned in skill order.
+        If any block fails, the remaining generations are cancelled.
+        """
+        # Fetch skill examples for every block up front; skills missing from the
+        # result (failed queries) are retrieved per block by the context builder
+        skill_contexts = await self.rag_builder.retriever.retrieve_by_skills_bulk(
+            skills=skills,
+            subject=context.subject,
+            top_k_per_skill=3
+        )
         
-        for i, skill in enumerate(skills):
+        # A failed block cancels the generations still running instead of leaving them orphaned
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [
+                    task_group.create_task(
+                        self._generate_enhanced_block(skill, context, i, len(skills), skill_contexts.get(skill.name))
+                    )
+                    for i, skill in enumerate(skills)
+                ]
+        except ExceptionGroup as eg:
+            # Surface the first block failure itself, as gather did
+            raise eg.exceptions[0]
+        
+        return [task.result() for task in tasks]
+    
+    async def _generate_enhanced_block(
+        self,
+        skill,
+        context: GenerationContext,
+        sequence_order: int,
+        total_blocks: int,
+        skill_context: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Generate one block, waiting for a free generation slot"""
+        async with self._generation_semaphore:
             try:
                 logger.info(
                     "Generating enhanced block",
                     skill=skill.name,
                     block_type=skill.block_type,
-                    position=i+1,
-                    total_blocks=len(skills)
+                    position=sequence_order+1,
+                    total_blocks=total_blocks
                 )
                 
                 # Generate block with enhanced framework guidance
                 block = await self.block_generator.generate_block(
                     skill=skill,
                     context=context,
-                    sequence_order=i
+                    sequence_order=sequence_order,
+                    skill_context=skill_context
                 )
                 
-                blocks.append(block)
-                
                 logger.info(
                     "Enhanced block generated successfully",
                     block_id=block.id,
@@ -320,16 +339,16 @@ class EnhancedLessonService:
                     framework_informed=True
                 )
                 
+                return block
+                
             except Exception as e:
                 logger.error(
                     "Failed to generate enhanced block",
                     skill=skill.name,
-                    sequence_order=i,
+                    sequence_order=sequence_order,
                     error=str(e)
                 )
                 raise
-        
-        return blocks
     
     def _create_enhanced_lesson_metadata(
         self, 
@@ -340,39 +359,29 @@ class EnhancedLessonService:
     ) -> LessonMetadata:
         """Create enhanced metadata with framework insights"""
         
-        skills_used = [skill.name for skill in skills]
-        cognitive_progression = [skill.color for skill in skills]
-        
-        # Enhanced duration estimation based on block types
-        duration_by_block = {
-            "MapIt": 15,    # Visual activities need more time
-            "SayIt": 12,    # Discussion activities  
-            "BuildIt": 20   # Construction activities need most time
-        }
+        skills_used = []
+        cognitive_progression = []
+        # Dicts keep first-seen order while de-duplicating
+        block_types_used = {}
+        cognitive_categories = {}
+        total_minutes = 0
         
-        total_minutes = sum(duration_by_block.get(skill.block_type, 12) for skill in skills)
+        # One pass collects the names, colors and types, and sums the duration estimate
+        for skill in skills:
+            skills_used.append(skill.name)
+            cognitive_progression.append(skill.color)
+            block_types_used[skill.block_type] = None
+            cognitive_categories[skill.color] = None
+            total_minutes += _BLOCK_DURATION_MINUTES.get(skill.block_type, _DEFAULT_BLOCK_DURATION_MINUTES)
         
         # Adjust for difficulty
         difficulty_multiplier = 1 + (difficulty * 0.3)  # Up to 30% longer for harder lessons
         estimated_minutes = int(total_minutes * difficulty_multiplier)
         
-        # Enhanced difficulty labels with framework context
-        difficulty_labels = {
-            (0.0, 0.25): "Foundational - Building basic understanding",
-            (0.25, 0.5): "Developing - Applying skills with support", 
-            (0.5, 0.75): "Proficient - Independent skill application",
-            (0.75, 1.0): "Advanced - Complex synthesis and evaluation"
-        }
-        
-        difficulty_level = "Developing"  # default
-        for (low, high), label in difficulty_labels.items():
-            if low <= difficulty <= high:
-                difficulty_level = label
-                break
-        
-        # Add framework-specific metadata
-        block_types_used = list(set(skill.block_type for skill in skills))
-        cognitive_categories = list(set(skill.color for skill in skills))
+        if 0.0 <= difficulty <= 1.0:
+            difficulty_level = _DIFFICULTY_LABELS[bisect_left(_DIFFICULTY_LABEL_BOUNDS, difficulty)]
+        else:
+            difficulty_level = "Developing"  # default
         
         return LessonMetadata(
             skills_used=skills_used,
@@ -380,8 +389,8 @@ class EnhancedLessonService:
             estimated_duration=f"{estimated_minutes} minutes",
             difficulty_level=difficulty_level,
             # Enhanced metadata
-            block_types_used=block_types_used,
-            cognitive_categories=cognitive_categories,
+            block_types_used=list(block_types_used),
+            cognitive_categories=list(cognitive_categories),
             framework_version="Enhanced v1.0",
             subject_optimized=True
         )
@@ -390,9 +399,10 @@ class EnhancedLessonService:
         self,
         lesson_id: str,
         request: LessonRequest,
-        blocks: List,
+        blocks_data: List[Dict[str, Any]],
         metadata: LessonMetadata,
-        user_id: str
+        user_id: str,
+        wait: bool = False
     ):
         """Save the enhanced lesson plan to storage"""
         
@@ -406,16 +416,19 @@ class EnhancedLessonService:
             subject=request.subject,
             curriculum=request.curriculum,
             difficulty=request.difficulty,
-            blocks=[block.dict() for block in blocks],  # Convert to dict for JSON storage
+            blocks=blocks_data,  # Serialized once by the caller
             metadata={
-                **metadata.dict(),
+                **metadata.model_dump(),
                 "enhancement_version": "v1.0",
                 "framework_utilized": True
             }
         )
         
-        # Save to storage
-        await self.storage_service.save_lesson(lesson_plan)
+        # Save to storage, in the background unless the caller needs it persisted first
+        if wait:
+            await self.storage_service.save_lesson(lesson_plan)
+        else:
+            self.storage_service.save_lesson_in_background(lesson_plan)
     
     # Inherit other methods from base service
     async def get_lesson(self, lesson_id: str, user_id: Optional[str] = None):
@@ -1,4 +1,5 @@
-from typing import List, Optional, Dict
+from types import MappingProxyType
+from typing import Any, List, Optional, Dict
 import uuid
 from datetime import datetime
 from app.models.requests import LessonRequest
@@ -15,6 +16,17 @@ import time
 
 logger = get_logger(__name__)
 
+# Scaffold types drawn when filling a lesson, with (options, weights) per difficulty band
+_SCAFFOLD_TYPES = ("MapIt", "SayIt", "BuildIt")
+_SCAFFOLD_WEIGHTS_LOW = (_SCAFFOLD_TYPES, (0.5, 0.4, 0.1))
+_SCAFFOLD_WEIGHTS_MID = (_SCAFFOLD_TYPES, (0.4, 0.4, 0.2))
+_SCAFFOLD_WEIGHTS_HIGH = (_SCAFFOLD_TYPES, (0.3, 0.3, 0.4))
+
+# Scaffold types to pick from after two consecutive blocks of the same type
+_SCAFFOLD_ALTERNATIVES = MappingProxyType({
+    scaffold: tuple(t for t in _SCAFFOLD_TYPES if t != scaffold) for scaffold in _SCAFFOLD_TYPES
+})
+
 
 class LessonService:
     """Main service for lesson generation and management with RAG-enhanced skill selection"""
@@ -105,9 +117,10 @@ class LessonService:
                 await self._save_lesson_plan(
                     lesson_id=lesson_id,
                     request=request,
-                    blocks=lesson_blocks,
+                    blocks_data=[block.model_dump(mode="json") for block in lesson_blocks],
                     metadata=lesson_metadata,
-                    user_id=user_id
+                    user_id=user_id,
+                    wait=request.sync_save
                 )
             
             # Step 7: Create response
@@ -161,25 +174,21 @@ class LessonService:
             # For easier lessons, alternate between MapIt and SayIt
             scaffolds.append("MapIt" if scaffolds[-1] == "SayIt" else "SayIt")
         
-        # Fill remaining steps with variety (avoid repetition)
-        while len(scaffolds) < step_count:
-            # Avoid three consecutive instances of the same type
+        # Weighted selection - BuildIt less common for easier lessons
+        if difficulty < 0.4:
+            options, weights = _SCAFFOLD_WEIGHTS_LOW
+        elif difficulty < 0.7:
+            options, weights = _SCAFFOLD_WEIGHTS_MID
+        else:
+            options, weights = _SCAFFOLD_WEIGHTS_HIGH
+        
+        # Fill remaining steps with variety (avoid repetition), drawing all weighted picks at once
+        for weighted_pick in random.choices(options, weights=weights, k=step_count - len(scaffolds)):
+            # Avoid three consecutive instances of the same type (the weighted pick goes unused)
             if len(scaffolds) >= 2 and scaffolds[-1] == scaffolds[-2]:
-                options = [t for t in ["MapIt", "SayIt", "BuildIt"] if t != scaffolds[-1]]
-                scaffolds.append(random.choice(options))
+                scaffolds.append(random.choice(_SCAFFOLD_ALTERNATIVES[scaffolds[-1]]))
             else:
-                # Weighted selection - BuildIt less common for easier lessons
-                if difficulty < 0.4:
-                    weights = {"MapIt": 0.5, "SayIt": 0.4, "BuildIt": 0.1}
-                elif difficulty < 0.7:
-                    weights = {"MapIt": 0.4, "SayIt": 0.4, "BuildIt": 0.2}
-                else:
-                    weights = {"MapIt": 0.3, "SayIt": 0.3, "BuildIt": 0.4}
-                
-                options = list(weights.keys())
-                weights_list = [weights[opt] for opt in options]
-                
-                scaffolds.append(random.choices(options, weights=weights_list)[0])
+                scaffolds.append(weighted_pick)
         
         return scaffolds
     
@@ -297,9 +306,10 @@ class LessonService:
         self,
         lesson_id: str,
         request: LessonRequest,
-        blocks: List,
+        blocks_data: List[Dict[str, Any]],
         metadata: LessonMetadata,
-        user_id: str
+        user_id: str,
+        wait: bool = False
     ):
         """Save the lesson plan to storage"""
         
@@ -313,16 +323,19 @@ class LessonService:
             subject=request.subject,
             curriculum=request.curriculum,
             difficulty=request.difficulty,
-            blocks=[block.dict() for block in blocks],  # Convert to dict for JSON storage
+            blocks=blocks_data,  # Serialized once by the caller
             metadata={
-                **metadata.dict(),
+                **metadata.model_dump(),
                 "rag_enhanced": True,
                 "skill_source": "rag_discovery"
             }
         )
         
-        # Save to storage
-        await self.storage_service.save_lesson(lesson_plan)
+        # Save to storage, in the background unless the caller needs it persisted first
+        if wait:
+            await self.storage_service.save_lesson(lesson_plan)
+        else:
+            self.storage_service.save_lesson_in_background(lesson_plan)
     
     def _lesson_plan_to_response(self, lesson_plan: LessonPlan) -> LessonResponse:
         """Convert LessonPlan to LessonResponse"""
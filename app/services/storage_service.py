@@ -1,4 +1,7 @@
-from typing import List, Optional
+import asyncio
+import heapq
+from operator import itemgetter
+from typing import List, Optional, Set
 from app.database.repositories.lesson_repo import LessonRepository
 from app.models.lesson import LessonPlan
 from app.utils.exceptions import DatabaseError
@@ -12,6 +15,8 @@ class StorageService:
     
     def __init__(self):
         self.lesson_repo = LessonRepository()
+        # Background saves in flight, held so they are not garbage collected mid-write
+        self._pending_saves: Set[asyncio.Task] = set()
     
     async def save_lesson(self, lesson_plan: LessonPlan) -> str:
         """
@@ -45,6 +50,29 @@ class StorageService:
             # )
             # raise DatabaseError(f"Failed to save lesson: {str(e)}")
     
+    def save_lesson_in_background(self, lesson_plan: LessonPlan):
+        """
+        Schedule a lesson plan save without waiting for it
+        
+        The save is tracked until it finishes, so drain_pending_saves can wait for it on shutdown.
+        Until then get_lesson will not find the lesson; callers that read it back right away
+        should await save_lesson instead.
+        
+        Args:
+            lesson_plan: The lesson plan to save
+        """
+        task = asyncio.create_task(self.save_lesson(lesson_plan))
+        self._pending_saves.add(task)
+        task.add_done_callback(self._pending_saves.discard)
+    
+    async def drain_pending_saves(self):
+        """Wait for all background lesson saves to finish"""
+        if not self._pending_saves:
+            return
+        
+        logger.info("Waiting for pending lesson saves", count=len(self._pending_saves))
+        await asyncio.gather(*self._pending_saves, return_exceptions=True)
+    
     async def get_lesson(self, lesson_id: str) -> Optional[LessonPlan]:
         """
         Retrieve a lesson by ID
@@ -177,7 +205,7 @@ class StorageService:
                 }
             
             # Calculate statistics
-            subjects = list(set(lesson.subject for lesson in lessons))
+            subjects = list(dict.fromkeys(lesson.subject for lesson in lessons))
             total_lessons = len(lessons)
             
             # Calculate average difficulty
@@ -190,7 +218,7 @@ class StorageService:
                     for skill in lesson.metadata['skills_used']:
                         skill_counts[skill] = skill_counts.get(skill, 0) + 1
             
-            most_used_skills = sorted(skill_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+            most_used_skills = heapq.nlargest(5, skill_counts.items(), key=itemgetter(1))
             
             stats = {
                 'total_lessons': total_lessons,
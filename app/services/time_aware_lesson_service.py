@@ -105,9 +105,10 @@ class TimeAwareLessonService:
                 await self._save_adaptive_lesson_plan(
                     lesson_id=lesson_id,
                     request=request,
-                    blocks=lesson_blocks,
+                    blocks_data=[block.model_dump(mode="json") for block in lesson_blocks],
                     metadata=lesson_metadata,
-                    user_id=user_id
+                    user_id=user_id,
+                    wait=request.sync_save
                 )
             
             # Step 8: Create response
@@ -379,9 +380,10 @@ class TimeAwareLessonService:
         self,
         lesson_id: str,
         request: LessonRequest,
-        blocks: List,
+        blocks_data: List[Dict[str, Any]],
         metadata: LessonMetadata,
-        user_id: str
+        user_id: str,
+        wait: bool = False
     ):
         """Save adaptive lesson plan with enhanced metadata"""
         
@@ -394,9 +396,9 @@ class TimeAwareLessonService:
             subject=request.subject,
             curriculum=request.curriculum,
             difficulty=request.difficulty,
-            blocks=[block.dict() for block in blocks],
+            blocks=blocks_data,  # Serialized once by the caller
             metadata={
-                **metadata.dict(),
+                **metadata.model_dump(),
                 "generation_type": "time_aware",
                 "time_constraints": {
                     "available_time": request.available_time_minutes,
@@ -407,7 +409,11 @@ class TimeAwareLessonService:
             }
         )
         
-        await self.storage_service.save_lesson(lesson_plan)
+        # Save to storage, in the background unless the caller needs it persisted first
+        if wait:
+            await self.storage_service.save_lesson(lesson_plan)
+        else:
+            self.storage_service.save_lesson_in_background(lesson_plan)
     
     async def get_lesson(self, lesson_id: str, user_id: Optional[str] = None) -> Optional[LessonResponse]:
         """Get lesson with enhanced features"""
@@ -518,15 +524,18 @@ class TimeAwareLessonService:
         total_lessons: int,
         used_scaffolds: List[str]
     ) -> LessonRequest:
-        """Create modified request for sequence position"""
+        """Create modified request for sequence position
+        
+        The base request was validated once on arrival; per-lesson requests are
+        shallow model_copy() clones with only the changed fields, not revalidated.
+        """
         
-        # Create copy of base request
-        sequence_request = base_request.copy()
+        updates = {}
         
         # Adjust difficulty progression
         if total_lessons > 1:
             difficulty_progression = position / (total_lessons - 1)
-            sequence_request.difficulty = (
+            updates["difficulty"] = (
                 base_request.difficulty * 0.7 + 
                 difficulty_progression * 0.3
             )
@@ -553,9 +562,9 @@ class TimeAwareLessonService:
                         preferred.append(scaffold_type)
             
             # Set preferred blocks for variety
-            sequence_request.preferred_blocks = preferred[:base_request.step_count]
+            updates["preferred_blocks"] = preferred[:base_request.step_count]
         
-        return sequence_request
+        return base_request.model_copy(update=updates)
 
 
 # Global instance
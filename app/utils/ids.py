@@ -0,0 +1,51 @@
+import os
+import threading
+from uuid import UUID
+
+# Random bytes fetched per os.urandom call (enough for 256 UUIDs)
+RANDOM_POOL_SIZE = 4096
+
+
+class _RandomBytesPool:
+    """Hands out slices of one large os.urandom read, refilling when drained"""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> bytes:
+        """Take n fresh random bytes"""
+        with self._lock:
+            if self._offset + n > len(self._buffer):
+                self._buffer = os.urandom(self._size)
+                self._offset = 0
+            start = self._offset
+            self._offset += n
+            return self._buffer[start:self._offset]
+
+    def reset(self):
+        """Drop buffered bytes so they are never handed out twice"""
+        self._buffer = b""
+        self._offset = 0
+        self._lock = threading.Lock()
+
+
+_random_pool = _RandomBytesPool(RANDOM_POOL_SIZE)
+
+# A forked worker must not reuse the parent's buffered bytes, or IDs would repeat across workers
+os.register_at_fork(after_in_child=_random_pool.reset)
+
+
+def uuid4_str() -> str:
+    """Random (version 4) UUID string, equivalent to str(uuid.uuid4())"""
+    raw = bytearray(_random_pool.take(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40  # Version 4
+    raw[8] = (raw[8] & 0x3F) | 0x80  # RFC 4122 variant
+    return str(UUID(bytes=bytes(raw)))
+
+
+def short_id(prefix: str) -> str:
+    """Prefixed short random ID with 8 hex chars (e.g. "block-1a2b3c4d")"""
+    return f"{prefix}-{_random_pool.take(4).hex()}"
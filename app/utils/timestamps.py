@@ -0,0 +1,6 @@
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """Current time as a timezone-aware UTC datetime (datetime.utcnow is naive and deprecated)"""
+    return datetime.now(timezone.utc)